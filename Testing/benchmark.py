@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+"""
+This python file benchmarks the outline extraction functions in reference.py and
+the Flask endpoints that serve them, using synthetic Bluebook PDFs so that no
+network access is needed.
+
+Every benchmark is timed "cold" (extraction caches cleared before each call) and
+"warm" (repeated calls served from the caches). The p50/p95/p99 latencies and the
+peak Python memory are reported, and can be saved as a baseline that later runs
+are compared against; a run fails if any p95 latency regresses past the tolerance.
+
+The subsection heading engines of reference.py are also compared for speed and
+accuracy: against the known headings of the synthetic editions, and against the
+text engine on the real editions in bluebook_pdfs.
+
+Usage:
+    python Testing/benchmark.py --pages 100 500 2000
+    python Testing/benchmark.py --pages 500 --save-baseline
+"""
+
+TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(TESTING_DIR)
+BASELINE_FILE = os.path.join(TESTING_DIR, 'benchmark_baselines.json')
+
+# Edition file name given to the generated PDFs
+EDITION = '2099_01.pdf'
+
+
+def percentile(samples, fraction):
+    """
+    Returns the value below which the given fraction of the sorted samples fall.
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(function, iterations, before_each=None):
+    """
+    Calls function repeatedly and records its latency and peak Python memory.
+
+    Args:
+    function (callable): The code to time.
+    iterations (int): Number of calls.
+    before_each (callable): Called before each timed call, outside the measurement.
+
+    Returns:
+    dict: The p50, p95 and p99 latency and maximum in milliseconds, and peak memory in KiB.
+    """
+    samples = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        if before_each is not None:
+            before_each()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(samples, 0.50), 3),
+        'p95_ms': round(percentile(samples, 0.95), 3),
+        'p99_ms': round(percentile(samples, 0.99), 3),
+        'max_ms': round(max(samples), 3),
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+
+def benchmark_edition(pdf_directory, pages, cold_iterations, warm_iterations):
+    """
+    Runs every benchmark against one generated edition.
+
+    Returns:
+    dict: Benchmark results keyed by "<pages>p/<benchmark>[cold|warm]".
+    """
+    import fitz
+    import reference
+    import app
+
+    pdf_path = os.path.join(pdf_directory, EDITION)
+    parts = reference.extract_part(pdf_path)
+    part_title = parts[len(parts) // 2]['title']
+    sections = reference.extract_section(pdf_path, part_title)
+    section_title = sections[len(sections) // 2]['title']
+    section_number = section_title.split()[1]
+    toc = reference.get_toc(pdf_path)
+    section_index = next(index for index, item in enumerate(toc) if item[1] == section_title.replace(reference.NO_SUBSECTIONS_SUFFIX, ''))
+    client = app.app.test_client()
+
+    def clear_caches():
+        reference.clear_cache()
+        app.edition_index.clear()
+        app._outline_responses.clear()
+
+    def ensure_indexed():
+        # The endpoints answer "pending" until the edition is indexed, so cold route
+        # timings include indexing the edition
+        if app.edition_index.get(EDITION) is None:
+            app.edition_index.load(EDITION)
+
+    doc = fitz.open(pdf_path)
+
+    def contains_subsections():
+        reference.contains_subsections(doc, toc, section_index)
+
+    def get(url, **kwargs):
+        ensure_indexed()
+        response = client.get(url, **kwargs)
+        assert response.status_code == 200, (url, response.status_code)
+
+    def post(url, data):
+        ensure_indexed()
+        response = client.post(url, data=data)
+        assert response.status_code == 200, (url, response.status_code)
+
+    benchmarks = {
+        'extract_part': lambda: reference.extract_part(pdf_path),
+        'extract_section': lambda: reference.extract_section(pdf_path, part_title),
+        'contains_subsections': contains_subsections,
+        'extract_subsection': lambda: reference.extract_subsection(pdf_path, section_number),
+        'route:/get_part_titles': lambda: post('/get_part_titles', {'pdf_file': EDITION}),
+        'route:/get_sections': lambda: get('/get_sections', query_string={'pdf_selected': EDITION, 'part_selected': part_title}),
+        'route:/get_subsections': lambda: get('/get_subsections', query_string={'pdf_selected': EDITION, 'section_selected': section_title}),
+        'route:/api/outline': lambda: get(f'/api/outline/{EDITION}', headers={'Accept-Encoding': 'gzip'}),
+    }
+
+    results = {}
+    for name, function in benchmarks.items():
+        results[f'{pages}p/{name}[cold]'] = measure(function, cold_iterations, before_each=clear_caches)
+        function()
+        results[f'{pages}p/{name}[warm]'] = measure(function, warm_iterations)
+    doc.close()
+    return results
+
+
+def _headings(subsection_index):
+    return {(section_number, subsection['title'], subsection['page_number'])
+            for section_number, subsections in subsection_index.items() for subsection in subsections}
+
+
+def benchmark_engines(pdf_path, label, cold_iterations, truth=None):
+    """
+    Times every subsection engine on one edition and scores the headings it finds.
+
+    Args:
+    pdf_path (str): Path to the edition.
+    label (str): Prefix of the result names, e.g. "500p" or "2024_02.pdf".
+    cold_iterations (int): Number of timed runs with the caches cleared.
+    truth (dict): The true headings as {section number: [{'title', 'page_number'}]};
+    without it the text engine's headings are the reference.
+
+    Returns:
+    dict: Benchmark results keyed by "<label>/subsection_index:<engine>[cold]", with the
+    number of headings found and their precision and recall against the reference.
+    """
+    import reference
+
+    expected = _headings(truth) if truth is not None else _headings(reference.build_subsection_index(pdf_path, engine='text'))
+    results = {}
+    for engine in reference.SUBSECTION_ENGINES:
+        result = measure(lambda: reference.build_subsection_index(pdf_path, engine=engine), cold_iterations,
+                         before_each=reference.clear_cache)
+        found = _headings(reference.build_subsection_index(pdf_path, engine=engine))
+        correct = len(found & expected)
+        result.update(
+            headings=len(found),
+            precision=round(correct / len(found), 4) if found else 0.0,
+            recall=round(correct / len(expected), 4) if expected else 0.0,
+            reference='synthetic' if truth is not None else 'text engine'
+        )
+        results[f'{label}/subsection_index:{engine}[cold]'] = result
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compares p95 latencies with the baseline.
+
+    Returns:
+    list: Descriptions of every benchmark whose p95 exceeds its baseline times the tolerance.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        # Ignore sub-millisecond noise on cached paths
+        allowed = max(baseline[name]['p95_ms'] * tolerance, baseline[name]['p95_ms'] + 1.0)
+        if result['p95_ms'] > allowed:
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms > allowed {allowed:.3f} ms (baseline {baseline[name]['p95_ms']} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Bluebook outline extraction and endpoints.")
+    parser.add_argument('--pages', type=int, nargs='+', default=[100, 500], help="Page counts of the synthetic editions (100 to 2000).")
+    parser.add_argument('--cold-iterations', type=int, default=5)
+    parser.add_argument('--warm-iterations', type=int, default=200)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline file to compare against or save to.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run's results as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Allowed p95 slowdown factor before a run fails.")
+    parser.add_argument('--output', help="Also write the results as JSON to this file.")
+    parser.add_argument('--editions', default=os.path.join(PROJECT_DIR, 'bluebook_pdfs'),
+                        help="Directory of real Bluebooks to compare the subsection engines on, if it exists.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_directory:
+        # Point the application at the synthetic editions and an empty index database
+        # before it is imported, so every request goes through the extraction path
+        os.environ['BLUEBOOK_PDF_DIRECTORY'] = work_directory
+        os.environ['BLUEBOOK_INDEX_DATABASE'] = os.path.join(work_directory, 'missing.db')
+        os.environ['BLUEBOOK_WARM_UP'] = '0'
+        sys.path.insert(0, PROJECT_DIR)
+        sys.path.insert(0, TESTING_DIR)
+        from synthetic_bluebook import make_synthetic_bluebook
+
+        results = {}
+        for pages in args.pages:
+            counts = make_synthetic_bluebook(os.path.join(work_directory, EDITION), pages=pages)
+            print(f"Generated {pages} page Bluebook: { {name: count for name, count in counts.items() if name != 'headings'} }")
+            results.update(benchmark_edition(work_directory, pages, args.cold_iterations, args.warm_iterations))
+            results.update(benchmark_engines(
+                os.path.join(work_directory, EDITION), f'{pages}p', args.cold_iterations, truth=counts['headings']
+            ))
+        if os.path.isdir(args.editions):
+            for edition in sorted(file for file in os.listdir(args.editions) if file.endswith('.pdf')):
+                results.update(benchmark_engines(os.path.join(args.editions, edition), edition, args.cold_iterations))
+
+    print(f"\n{'benchmark':<48}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>12}")
+    for name, result in results.items():
+        print(f"{name:<48}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}{result['peak_kib']:>12}")
+    engine_results = {name: result for name, result in results.items() if 'reference' in result}
+    if engine_results:
+        print(f"\n{'subsection engine':<48}{'headings':>10}{'precision':>11}{'recall':>9}  reference")
+        for name, result in engine_results.items():
+            print(f"{name:<48}{result['headings']:>10}{result['precision']:>11}{result['recall']:>9}  {result['reference']}")
+    if sys.platform != 'win32':
+        import resource
+        # ru_maxrss is in KiB on Linux and in bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"\nPeak process RSS: {max_rss // 1024 if sys.platform != 'darwin' else max_rss // (1024 * 1024)} MiB")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, 'r') as file:
+        regressions = compare_with_baseline(results, json.load(file), args.tolerance)
+    if regressions:
+        print("\nPerformance regressions:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
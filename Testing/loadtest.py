@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+from benchmark import PROJECT_DIR, percentile
+
+"""
+This python file load-tests the web application under gunicorn. It starts a local
+gunicorn with the given server profile, lets a number of simulated users browse
+random editions at the same time the way the frontend does (outline, title search,
+excerpts and PDF pages), and reports the throughput, the latency percentiles of
+each endpoint and the memory of every gunicorn process, so the profiles in
+gunicorn.conf.py can be compared on the machine that will run them.
+
+Unless --pdf-directory is given, synthetic Bluebooks are generated so that no
+network access is needed. The load generator runs on the same machine as the
+server and competes with it for CPU, so compare profiles within one run rather
+than across machines.
+
+Usage:
+    python Testing/loadtest.py --profiles gthread sync --concurrency 4 16 --duration 20
+    python Testing/loadtest.py --profiles gthread --workers 2 --threads 8 --no-preload
+"""
+
+EDITIONS = ('2022_12.pdf', '2023_08.pdf', '2024_02.pdf')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_memory(pid):
+    """
+    Reads the resident and proportional set size of a process from /proc, in MiB.
+    The proportional size splits pages shared copy-on-write between the processes sharing them.
+
+    Returns:
+    dict: 'rss_mib' and, when available, 'pss_mib'.
+    """
+    memory = {}
+    with open(f'/proc/{pid}/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                memory['rss_mib'] = round(int(line.split()[1]) / 1024, 1)
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file:
+            for line in file:
+                if line.startswith('Pss:'):
+                    memory['pss_mib'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def worker_pids(master_pid):
+    """
+    Returns the process ids of the gunicorn workers, the children of the master.
+    """
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                # The parent pid is the second field after the parenthesized command name
+                if int(file.read().rsplit(')', 1)[1].split()[1]) == master_pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(children)
+
+
+class Server:
+    """
+    A gunicorn running the application with one server profile, started with gunicorn.conf.py.
+    """
+
+    def __init__(self, profile, pdf_directory, workers=None, threads=None, preload=True, extra_env=None):
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        env = dict(os.environ)
+        env.update(
+            BLUEBOOK_SERVER_PROFILE=profile,
+            BLUEBOOK_PDF_DIRECTORY=pdf_directory,
+            BLUEBOOK_PRELOAD='1' if preload else '0',
+            # No downloads or polling during the measurement
+            BLUEBOOK_WATCH_INTERVAL='0'
+        )
+        env.update(extra_env or {})
+        if workers:
+            env['WEB_CONCURRENCY'] = str(workers)
+        if threads:
+            env['BLUEBOOK_THREADS'] = str(threads)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{self.port}', 'app:app'],
+            cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def wait_until_ready(self, timeout=300):
+        """
+        Waits until every worker has finished warming up, i.e. /readyz answers 200 on repeated requests.
+        """
+        deadline = time.time() + timeout
+        ready_answers = 0
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self.process.returncode}")
+            try:
+                ready_answers = ready_answers + 1 if requests.get(self.url + '/readyz', timeout=5).status_code == 200 else 0
+            except requests.RequestException:
+                ready_answers = 0
+            # Without preloading every worker warms up on its own; wait until several answers in a row are ready
+            if ready_answers >= 10:
+                return
+            time.sleep(0.2 if ready_answers else 1)
+        raise RuntimeError("gunicorn did not become ready in time")
+
+    def memory(self):
+        """
+        Returns the memory of the master and of every worker.
+        """
+        return {
+            'master': process_memory(self.process.pid),
+            'workers': [process_memory(pid) for pid in worker_pids(self.process.pid)]
+        }
+
+    def stop(self):
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# Share of visitors who use the title search box instead of the dropdowns
+SEARCH_SHARE = 0.3
+# Share of dropdown visitors who open a part, i.e. a page of the whole PDF, rather than a section excerpt
+PART_SHARE = 0.2
+# Bytes requested per range request by the simulated PDF viewer
+VIEWER_CHUNK = 64 * 1024
+
+
+def click_through(session, url, edition, rng, record, outlines):
+    """
+    Simulates one visitor the way static/script.js drives the server. Selecting an
+    edition loads its whole outline from /api/outline, revalidated with the ETag of
+    the visitor's earlier visits; the dropdowns are then filled locally. Some visitors
+    type in the title search box, which asks /api/suggest as they type, and open a
+    suggestion. The others open a section (or subsection) as an excerpt, or a part as
+    a page of the local PDF, which a PDF viewer fetches with range requests.
+
+    Args:
+    outlines (dict): The visitor's cached {edition: (etag, parts)}, like the browser's localStorage.
+    """
+    def timed(name, path, ok_statuses=(200,), **kwargs):
+        start = time.perf_counter()
+        try:
+            response = session.get(url + path, timeout=60, **kwargs)
+            ok = response.status_code in ok_statuses
+        except requests.RequestException:
+            response, ok = None, False
+        record(name, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def open_pdf():
+        # The viewer reads the start of the file, then the bytes around the page it shows
+        response = timed('/pdf', f'/pdf/{edition}', ok_statuses=(206,), headers={'Range': f'bytes=0-{VIEWER_CHUNK - 1}'})
+        if response is None:
+            return
+        size = int(response.headers['Content-Range'].rsplit('/', 1)[1])
+        offset = rng.randrange(max(size - VIEWER_CHUNK, 1))
+        timed('/pdf', f'/pdf/{edition}', ok_statuses=(206,), headers={'Range': f'bytes={offset}-{offset + VIEWER_CHUNK - 1}'})
+
+    cached = outlines.get(edition)
+    headers = {'If-None-Match': cached[0]} if cached else {}
+    response = timed('/api/outline', f'/api/outline/{edition}', ok_statuses=(200, 304), headers=headers)
+    if response is None:
+        return
+    if response.status_code == 200:
+        outlines[edition] = (response.headers.get('ETag'), response.json()['parts'])
+    sections = [section for part in outlines[edition][1] for section in part['sections'] if section['has_subsections']]
+    if not sections:
+        return
+
+    if rng.random() < SEARCH_SHARE:
+        section = rng.choice(sections)
+        title = rng.choice([section] + section['subsections'])['title']
+        suggestions = []
+        # Typing pauses long enough for the debounced search box to ask the server a few times
+        for length in (3, 5, 8):
+            response = timed('/api/suggest', '/api/suggest', params={'prefix': title[:length], 'edition': edition})
+            if response is not None:
+                suggestions = response.json()['suggestions']
+        if suggestions:
+            open_pdf()
+    elif rng.random() < PART_SHARE:
+        open_pdf()
+    else:
+        section = rng.choice(sections)
+        timed('/excerpt', f"/excerpt/{edition}/{section['section_number']}")
+
+
+def run_load(url, editions, concurrency, duration, seed=0):
+    """
+    Runs concurrency simulated visitors against the server for duration seconds.
+
+    Returns:
+    dict: Throughput, error count and latency percentiles overall and per endpoint.
+    """
+    samples = {}
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def record(name, seconds, ok):
+        with lock:
+            samples.setdefault(name, []).append(seconds * 1000)
+            if not ok:
+                errors[0] += 1
+
+    def visitor(number):
+        rng = random.Random(seed * 1000 + number)
+        outlines = {}
+        with requests.Session() as session:
+            while time.time() < stop_at:
+                click_through(session, url, rng.choice(editions), rng, record, outlines)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=visitor, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    def summary(values):
+        return {
+            'requests': len(values),
+            'p50_ms': round(percentile(values, 0.50), 1),
+            'p95_ms': round(percentile(values, 0.95), 1),
+            'p99_ms': round(percentile(values, 0.99), 1),
+            'max_ms': round(max(values), 1)
+        }
+
+    all_samples = [value for values in samples.values() for value in values]
+    return {
+        'concurrency': concurrency,
+        'throughput_rps': round(len(all_samples) / elapsed, 1),
+        'errors': errors[0],
+        'overall': summary(all_samples) if all_samples else {},
+        'endpoints': {name: summary(values) for name, values in sorted(samples.items())}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Bluebook web application under gunicorn.")
+    parser.add_argument('--profiles', nargs='+', default=['gthread', 'sync'], help="Server profiles from gunicorn.conf.py.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16], help="Simultaneous simulated users.")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds of load per profile and concurrency.")
+    parser.add_argument('--workers', type=int, help="Override the profile's number of worker processes.")
+    parser.add_argument('--threads', type=int, help="Override the profile's threads per worker.")
+    parser.add_argument('--no-preload', action='store_true', help="Let every worker load the application itself.")
+    parser.add_argument('--pdf-directory', help="Directory of Bluebook PDFs to serve instead of synthetic ones.")
+    parser.add_argument('--pages', type=int, default=500, help="Page count of the synthetic editions.")
+    parser.add_argument('--output', help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    if sys.platform != 'linux':
+        print("Worker memory is read from /proc and is only reported on Linux.")
+
+    with tempfile.TemporaryDirectory() as work_directory:
+        pdf_directory = args.pdf_directory
+        extra_env = {}
+        if pdf_directory is None:
+            from synthetic_bluebook import make_synthetic_bluebook
+            pdf_directory = work_directory
+            for seed, edition in enumerate(EDITIONS):
+                make_synthetic_bluebook(os.path.join(pdf_directory, edition), pages=args.pages, seed=seed)
+            print(f"Generated {len(EDITIONS)} synthetic {args.pages} page Bluebooks")
+            # Keep the synthetic editions out of the project's index database and render cache
+            extra_env = {
+                'BLUEBOOK_INDEX_DATABASE': os.path.join(work_directory, 'missing.db'),
+                'BLUEBOOK_RENDER_CACHE_DIRECTORY': os.path.join(work_directory, 'render_cache')
+            }
+        editions = sorted(file for file in os.listdir(pdf_directory) if file.endswith('.pdf'))
+
+        results = []
+        for profile in args.profiles:
+            server = Server(
+                profile, pdf_directory, workers=args.workers, threads=args.threads, preload=not args.no_preload, extra_env=extra_env
+            )
+            try:
+                start = time.perf_counter()
+                server.wait_until_ready()
+                startup_seconds = round(time.perf_counter() - start, 1)
+                for concurrency in args.concurrency:
+                    result = run_load(server.url, editions, concurrency, args.duration)
+                    result.update(profile=profile, startup_s=startup_seconds, memory=server.memory() if sys.platform == 'linux' else None)
+                    results.append(result)
+                    print(f"\n{profile}, {concurrency} users: {result['throughput_rps']} req/s, {result['errors']} errors, "
+                          f"p50 {result['overall'].get('p50_ms')} ms, p95 {result['overall'].get('p95_ms')} ms, "
+                          f"p99 {result['overall'].get('p99_ms')} ms (ready after {startup_seconds} s)")
+                    for name, summary in result['endpoints'].items():
+                        print(f"  {name:<20}{summary['requests']:>8} requests  p50 {summary['p50_ms']:>8} ms  "
+                              f"p95 {summary['p95_ms']:>8} ms  p99 {summary['p99_ms']:>8} ms")
+                    if result['memory']:
+                        workers = ', '.join(
+                            f"{memory.get('rss_mib')} MiB RSS / {memory.get('pss_mib', '?')} MiB PSS"
+                            for memory in result['memory']['workers']
+                        )
+                        print(f"  master {result['memory']['master'].get('rss_mib')} MiB RSS; workers: {workers}")
+            finally:
+                server.stop()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    return 0 if all(result['errors'] == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import os
+import random
+import argparse
+
+import fitz
+
+"""
+This python file generates synthetic RIDOT Bluebook PDFs, so the extraction
+functions and the web application can be benchmarked without downloading the
+real editions. The generated PDFs follow the layout the extraction code expects:
+a TOC with "Part N" and "SECTION nnn TITLE" entries, subsection headings such as
+"403.01 TITLE" (sometimes with the number and title on separate lines) in bold,
+and body text containing decimal numbers. Some body lines start with a
+cross-reference such as "403.05 AASHTO T 27 ...", which look like headings in the
+plain text but are not bold.
+"""
+
+WORDS = (
+    "ASPHALT", "CONCRETE", "DRAINAGE", "EXCAVATION", "GUARDRAIL", "PAVEMENT", "SIGNING",
+    "BRIDGE", "CULVERT", "CURBING", "SIDEWALK", "LANDSCAPING", "LIGHTING", "MARKINGS",
+    "MATERIALS", "BORROW", "EMBANKMENT", "REINFORCING", "STEEL", "TIMBER", "MASONRY"
+)
+BODY_SENTENCES = (
+    "The Contractor shall place the material in layers not exceeding 0.5 feet in depth.",
+    "Payment will be made at the contract unit price per square yard, measured to the nearest 0.1 unit.",
+    "Tolerances of 1.5 inches are permitted provided the surface is finished to the required grade.",
+    "All work shall conform to the applicable requirements of the Standard Specifications.",
+    "The Engineer may reject any material that does not meet the gradation limits of Table 2.3.",
+    "Samples shall be taken at a rate of one per 500 tons and tested within 24 hours.",
+)
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINE_HEIGHT = 14
+
+
+def _title(rng, words=2):
+    return " ".join(rng.sample(WORDS, words))
+
+
+def _write_lines(page, lines, y=72, fontname="helv", fontsize=10):
+    """
+    Writes the lines that still fit on the page starting at height y, in one text
+    insertion, and returns the height below the last line.
+    """
+    lines = lines[:max(0, int((PAGE_HEIGHT - 72 - y) // LINE_HEIGHT) + 1)]
+    if lines:
+        page.insert_text((72, y), lines, fontname=fontname, fontsize=fontsize, lineheight=LINE_HEIGHT / fontsize)
+    return y + LINE_HEIGHT * len(lines)
+
+
+def make_synthetic_bluebook(pdf_path, pages=500, seed=0):
+    """
+    Writes a synthetic Bluebook PDF with roughly the requested number of pages.
+
+    Each section takes four pages: a heading page starting its subsections
+    followed by pages of body text. Every part holds ten sections and every seventh section
+    has no subsections. Every fifth section with subsections has a body line starting
+    with a cross-reference to one of its subsections.
+
+    Args:
+    pdf_path (str): Where to save the PDF.
+    pages (int): Approximate number of pages to generate.
+    seed (int): Seed for the random titles and text, so runs are reproducible.
+
+    Returns:
+    dict: Counts of the generated parts, sections and subsections, and under 'headings'
+    the true subsection headings as {section number: [{'title', 'page_number'}]}.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    toc = []
+
+    # Front matter: title page and two pages of table of contents
+    for text in ("STANDARD SPECIFICATIONS FOR ROAD AND BRIDGE CONSTRUCTION", "TABLE OF CONTENTS", "TABLE OF CONTENTS (continued)"):
+        _write_lines(doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), [text], fontsize=14)
+
+    # Four pages per section plus one part title page per ten sections
+    section_count = max(1, int((pages - 3) / 4.1))
+    counts = {'parts': 0, 'sections': 0, 'subsections': 0, 'headings': {}}
+    for section_index in range(section_count):
+        part_number, position = divmod(section_index, 10)
+        part_number += 1
+        if position == 0:
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            _write_lines(page, [f"PART {part_number}00", _title(rng, 3)], fontname="hebo", fontsize=14)
+            toc.append([1, f"Part {part_number}00", doc.page_count])
+            counts['parts'] += 1
+
+        section_number = part_number * 100 + position + 1
+        section_title = f"SECTION {section_number} {_title(rng)}"
+        # Inserting pages invalidates earlier Page objects, so create them all first
+        for _ in range(4):
+            doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        body_pages = [doc[page_num] for page_num in range(doc.page_count - 4, doc.page_count)]
+        page = body_pages[0]
+        toc.append([2, section_title, page.number + 1])
+        counts['sections'] += 1
+        y = _write_lines(page, [section_title], fontname="hebo", fontsize=12) + LINE_HEIGHT
+
+        subsection_count = 0 if section_index % 7 == 6 else rng.randint(2, 8)
+        page_index = 0
+        for subsection in range(1, subsection_count + 1):
+            # Two subsections per page, starting on the section's heading page
+            if subsection > 1 and subsection % 2 == 1 and page_index < len(body_pages) - 1:
+                page_index += 1
+                y = 72
+            page = body_pages[page_index]
+            heading = f"{section_number}.{subsection:02d}"
+            title = f"{_title(rng)}."
+            if subsection % 3 == 0:
+                # Number and title on separate lines, as in some of the real editions
+                y = _write_lines(page, [heading, title], y=y, fontname="hebo")
+            else:
+                y = _write_lines(page, [f"{heading} {title}"], y=y, fontname="hebo")
+            y = _write_lines(page, [rng.choice(BODY_SENTENCES) for _ in range(3)], y=y)
+            counts['subsections'] += 1
+            counts['headings'].setdefault(str(section_number), []).append(
+                {'title': f"{heading} {title}".rstrip('.'), 'page_number': page.number + 1}
+            )
+        if subsection_count == 0:
+            _write_lines(page, [rng.choice(BODY_SENTENCES) for _ in range(10)], y=y)
+        for body_page in body_pages[1:]:
+            lines = [rng.choice(BODY_SENTENCES) for _ in range(20)]
+            if subsection_count and section_index % 5 == 0 and body_page is body_pages[-1]:
+                lines[0] = f"{section_number}.{rng.randint(1, subsection_count):02d} AASHTO T 27 sieve analysis applies to every sample."
+            _write_lines(body_page, lines, y=PAGE_HEIGHT / 2)
+
+    doc.set_toc(toc)
+    doc.save(pdf_path, garbage=3, deflate=True)
+    doc.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic RIDOT Bluebook PDF.")
+    parser.add_argument('pdf_path', help="Where to save the PDF, e.g. bluebook_pdfs/2099_01.pdf")
+    parser.add_argument('--pages', type=int, default=500, help="Approximate number of pages.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(os.path.abspath(args.pdf_path)), exist_ok=True)
+    counts = make_synthetic_bluebook(args.pdf_path, pages=args.pages, seed=args.seed)
+    print({name: count for name, count in counts.items() if name != 'headings'})
@@ -0,0 +1,806 @@
+import os
+import sys
+import csv
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fitz
+
+TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(TESTING_DIR)
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, TESTING_DIR)
+
+import fetchBluebook
+import outline_index
+import outline_export
+from edition_index import EditionIndex
+import reference
+from render_cache import RenderCache
+from title_index import TitleIndex, suggest
+from synthetic_bluebook import make_synthetic_bluebook
+
+"""
+This python file holds the unit tests. The downloader is tested against a local
+HTTP server and everything else on small synthetic Bluebooks or hand-made data,
+so no network access is needed.
+
+Usage:
+    python -m unittest Testing/unitTest.py
+"""
+
+EDITION = '2099_01.pdf'
+
+
+def make_pdf_bytes(pages=3):
+    """
+    Returns a small PDF with the given number of pages.
+    """
+    with fitz.open() as doc:
+        for page_number in range(pages):
+            doc.new_page().insert_text((72, 72), f"Page {page_number + 1}")
+        return doc.tobytes()
+
+
+class BluebookHandler(BaseHTTPRequestHandler):
+    """
+    Serves the server's content with ETag, conditional GET and Range / If-Range support.
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.failures:
+            server.failures -= 1
+            self.send_error(503)
+            return
+        if server.status is not None:
+            self.send_error(server.status)
+            return
+        content = server.content
+        if self.headers.get('If-None-Match') == server.etag:
+            self.send_response(304)
+            self.send_header('ETag', server.etag)
+            self.end_headers()
+            return
+        start = 0
+        requested_range = self.headers.get('Range')
+        if requested_range and self.headers.get('If-Range') == server.etag:
+            start = int(requested_range.split('=')[1].rstrip('-'))
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(content)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+        body = content[start:]
+        self.send_header('ETag', server.etag)
+        self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.content = make_pdf_bytes()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), BluebookHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/{EDITION}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.content = self.content
+        self.server.etag = '"v1"'
+        self.server.failures = 0
+        self.server.status = None
+        self.server.requests = []
+        self.pdf_directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.pdf_directory, EDITION)
+        self.backoff = fetchBluebook.BACKOFF_SECONDS
+        fetchBluebook.BACKOFF_SECONDS = 0
+
+    def tearDown(self):
+        fetchBluebook.BACKOFF_SECONDS = self.backoff
+        shutil.rmtree(self.pdf_directory)
+
+    def download(self):
+        return fetchBluebook.download_pdf(self.url, EDITION, self.pdf_directory)
+
+    def write_partial(self, data, etag):
+        """
+        Leaves a partial download behind, as an interrupted earlier run would.
+        """
+        with open(self.path + '.part', 'wb') as file:
+            file.write(data)
+        fetchBluebook._save_state(self.pdf_directory, {EDITION: {'partial': {'etag': etag, 'last_modified': None}}})
+
+    def assertDownloaded(self):
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertFalse(os.path.exists(self.path + '.part'))
+
+    def test_full_download(self):
+        self.assertEqual(self.download(), "downloaded")
+        self.assertDownloaded()
+        self.assertNotIn('Range', self.server.requests[0])
+        self.assertTrue(os.path.exists(fetchBluebook.linearized_path(self.path)))
+
+    def test_unchanged_edition_is_skipped(self):
+        self.download()
+        self.assertEqual(self.download(), "unchanged")
+        self.assertEqual(self.server.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertDownloaded()
+
+    def test_partial_download_is_resumed(self):
+        half = len(self.content) // 2
+        self.write_partial(self.content[:half], '"v1"')
+        self.assertEqual(self.download(), "downloaded")
+        self.assertEqual(self.server.requests[0].get('Range'), f"bytes={half}-")
+        self.assertEqual(self.server.requests[0].get('If-Range'), '"v1"')
+        self.assertDownloaded()
+
+    def test_changed_edition_restarts_partial_download(self):
+        # If-Range no longer matches, so the server sends the whole new version
+        self.write_partial(b'old version', '"v0"')
+        self.assertEqual(self.download(), "downloaded")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertDownloaded()
+
+    def test_unsatisfiable_range_restarts_download(self):
+        self.write_partial(self.content + b'trailing bytes', '"v1"')
+        self.assertEqual(self.download(), "downloaded")
+        self.assertIn('Range', self.server.requests[0])
+        self.assertNotIn('Range', self.server.requests[1])
+        self.assertDownloaded()
+
+    def test_server_errors_are_retried(self):
+        self.server.failures = 2
+        self.assertEqual(self.download(), "downloaded")
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertDownloaded()
+
+    def test_persistent_server_errors_fail(self):
+        self.server.failures = fetchBluebook.MAX_RETRIES + 1
+        self.assertEqual(self.download(), "failed")
+        self.assertEqual(len(self.server.requests), fetchBluebook.MAX_RETRIES + 1)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_client_errors_are_not_retried(self):
+        self.server.status = 404
+        self.assertEqual(self.download(), "failed")
+        self.assertEqual(len(self.server.requests), 1)
+
+
+class LinearizeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf_directory = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.pdf_directory, EDITION)
+        with open(self.pdf_path, 'wb') as file:
+            file.write(make_pdf_bytes())
+
+    def tearDown(self):
+        shutil.rmtree(self.pdf_directory)
+
+    def test_copy_has_the_original_modification_time(self):
+        fetchBluebook.linearize_pdf(self.pdf_path)
+        path = fetchBluebook.linearized_path(self.pdf_path)
+        if os.path.exists(path):
+            self.assertEqual(os.stat(path).st_mtime_ns, os.stat(self.pdf_path).st_mtime_ns)
+
+    def test_unwritable_directory_is_not_an_error(self):
+        # A file in place of the linearized directory makes creating it fail
+        with open(os.path.join(self.pdf_directory, fetchBluebook.LINEARIZED_DIRECTORY), 'w'):
+            pass
+        self.assertFalse(fetchBluebook.linearize_pdf(self.pdf_path))
+
+    @unittest.skipIf(fetchBluebook.fcntl is None, "file locks are not available")
+    def test_pdf_being_linearized_elsewhere_is_skipped(self):
+        directory, filename = os.path.split(fetchBluebook.linearized_path(self.pdf_path))
+        os.makedirs(directory)
+        # flock locks belong to the open file, so a second open in this process is refused like another process
+        with open(os.path.join(directory, f".{filename}.lock"), 'w') as lock_file:
+            fetchBluebook.fcntl.flock(lock_file, fetchBluebook.fcntl.LOCK_EX)
+            self.assertFalse(fetchBluebook.linearize_pdf(self.pdf_path))
+        self.assertFalse(os.path.exists(fetchBluebook.linearized_path(self.pdf_path)))
+
+
+def subsection(number, title, text):
+    """
+    Builds a (number, title, checksum, text) entry as stored in the subsection_text table.
+    """
+    return (number, title, outline_index._text_checksum(text), text)
+
+
+class CompareEntriesTest(unittest.TestCase):
+
+    def compare(self, from_entries, to_entries):
+        differences = outline_index._compare_entries('2023_08.pdf', from_entries, '2024_02.pdf', to_entries)
+        return [(row['status'], row['from_number'], row['to_number']) for row in differences]
+
+    def test_identical_sections_are_unchanged(self):
+        entries = [subsection('403', 'SECTION 403', 'Intro'), subsection('403.01', 'DESCRIPTION', 'Pave it.')]
+        self.assertEqual(self.compare(entries, list(entries)), [
+            ('unchanged', '403', '403'), ('unchanged', '403.01', '403.01')
+        ])
+
+    def test_renumbered_subsection_is_matched_by_title(self):
+        differences = outline_index._compare_entries(
+            '2023_08.pdf', [subsection('403.02', 'MATERIALS', 'Asphalt.')],
+            '2024_02.pdf', [subsection('403.03', 'MATERIALS', 'Asphalt.')]
+        )
+        self.assertEqual(len(differences), 1)
+        self.assertEqual(differences[0]['status'], 'changed')
+        self.assertEqual((differences[0]['from_number'], differences[0]['to_number']), ('403.02', '403.03'))
+        # Only the number changed, so there is no text diff
+        self.assertIsNone(differences[0]['diff'])
+
+    def test_retitled_subsection_is_matched_by_number(self):
+        differences = outline_index._compare_entries(
+            '2023_08.pdf', [subsection('403.02', 'MATERIALS', 'Asphalt.')],
+            '2024_02.pdf', [subsection('403.02', 'MATERIAL REQUIREMENTS', 'Asphalt.')]
+        )
+        self.assertEqual(len(differences), 1)
+        self.assertEqual(differences[0]['status'], 'changed')
+        self.assertEqual((differences[0]['from_title'], differences[0]['to_title']), ('MATERIALS', 'MATERIAL REQUIREMENTS'))
+
+    def test_changed_text_is_diffed(self):
+        differences = outline_index._compare_entries(
+            '2023_08.pdf', [subsection('403.02', 'MATERIALS', 'Asphalt.\nGrade A.')],
+            '2024_02.pdf', [subsection('403.02', 'MATERIALS', 'Asphalt.\nGrade B.')]
+        )
+        self.assertEqual(differences[0]['status'], 'changed')
+        self.assertIn('-Grade A.', differences[0]['diff'])
+        self.assertIn('+Grade B.', differences[0]['diff'])
+
+    def test_reflowed_text_is_unchanged(self):
+        self.assertEqual(self.compare(
+            [subsection('403.02', 'MATERIALS', 'Hot mix\nasphalt.')], [subsection('403.02', 'MATERIALS', 'Hot mix asphalt.')]
+        ), [('unchanged', '403.02', '403.02')])
+
+    def test_added_and_removed_subsections(self):
+        from_entries = [
+            subsection('403.01', 'DESCRIPTION', 'Pave it.'),
+            subsection('403.02', 'TACK COAT', 'Tack it.'),
+            subsection('403.03', 'MEASUREMENT', 'Measure it.')
+        ]
+        to_entries = [
+            subsection('403.01', 'DESCRIPTION', 'Pave it.'),
+            subsection('403.03', 'MEASUREMENT', 'Measure it.'),
+            subsection('403.04', 'BASIS OF PAYMENT', 'Pay for it.')
+        ]
+        # A removed subsection is listed after the subsection that preceded it
+        self.assertEqual(self.compare(from_entries, to_entries), [
+            ('unchanged', '403.01', '403.01'),
+            ('removed', '403.02', None),
+            ('unchanged', '403.03', '403.03'),
+            ('added', None, '403.04')
+        ])
+
+
+class OutlineIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf_directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.pdf_directory, 'index.db')
+        self.path = os.path.join(self.pdf_directory, EDITION)
+        make_synthetic_bluebook(self.path, pages=40, seed=0)
+
+    def tearDown(self):
+        reference.clear_cache()
+        shutil.rmtree(self.pdf_directory)
+
+    def build(self):
+        return outline_index.build_index(self.pdf_directory, database=self.database, workers=1)
+
+    def test_outline_matches_extraction(self):
+        self.assertEqual(self.build(), [EDITION])
+        self.assertEqual(outline_index.query_outline(self.path, self.database), reference.extract_outline(self.path))
+
+    def test_unchanged_edition_is_skipped(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_touched_edition_is_stale_until_rebuilt(self):
+        self.build()
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        # The stored signature no longer matches, so the outline is not served from the index
+        self.assertIsNone(outline_index.query_outline(self.path, self.database))
+        # The content is the same, so the rebuild only refreshes the signature
+        self.assertEqual(self.build(), [])
+        self.assertIsNotNone(outline_index.query_outline(self.path, self.database))
+
+    def test_changed_edition_is_reindexed(self):
+        self.build()
+        make_synthetic_bluebook(self.path, pages=40, seed=1)
+        self.assertEqual(self.build(), [EDITION])
+        self.assertEqual(outline_index.query_outline(self.path, self.database), reference.extract_outline(self.path))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "fork is not available")
+    def test_forked_child_opens_its_own_connection(self):
+        self.build()
+        parent_connection = outline_index._connection(self.database)
+        pid = os.fork()
+        if pid == 0:
+            # Exit codes report the result, since the child cannot fail the test itself
+            connection = outline_index._connection(self.database)
+            os._exit(0 if connection is not None and connection is not parent_connection else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(outline_index._connection(self.database), parent_connection)
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf_directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.pdf_directory, EDITION)
+        make_synthetic_bluebook(self.path, pages=40, seed=0)
+        self.outline = reference.extract_outline(self.path)
+        reference.clear_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.pdf_directory)
+
+    def export(self, output_format, editions=None):
+        output_path = os.path.join(self.pdf_directory, f"outline.{output_format}")
+        with open(output_path, 'w', newline='') as output:
+            result = outline_export.export_index(output, self.pdf_directory, output_format, workers=1, editions=editions)
+        with open(output_path, newline='') as output:
+            if output_format == 'csv':
+                rows = list(csv.DictReader(output))
+            else:
+                rows = [json.loads(line) for line in output]
+        return result, rows
+
+    def expected_rows(self):
+        """
+        Rebuilds the rows from the extracted outline.
+        """
+        rows = []
+        for part in self.outline:
+            rows.append(('part', part['title'], '', part['page_number']))
+            for section in part['sections']:
+                rows.append(('section', section['title'], section['section_number'], section['page_number']))
+                for subsection in section['subsections']:
+                    rows.append(('subsection', subsection['title'], section['section_number'], subsection['page_number']))
+        return rows
+
+    def test_jsonl_matches_extraction(self):
+        result, rows = self.export('jsonl')
+        self.assertEqual(result, {'rows': len(rows), 'failed': []})
+        self.assertEqual(
+            [(row['kind'], row['title'], row['section_number'], row['page_number']) for row in rows], self.expected_rows()
+        )
+        self.assertTrue(all(row['edition'] == EDITION for row in rows))
+        sections = [row for row in rows if row['kind'] == 'section']
+        self.assertEqual(
+            [row['has_subsections'] for row in sections],
+            [section['has_subsections'] for part in self.outline for section in part['sections']]
+        )
+
+    def test_csv_matches_extraction(self):
+        result, rows = self.export('csv')
+        self.assertEqual(result, {'rows': len(rows), 'failed': []})
+        self.assertEqual(list(rows[0]), list(outline_export.FIELDS))
+        # CSV stores every value as text
+        self.assertEqual(
+            [(row['kind'], row['title'], row['section_number'], int(row['page_number'])) for row in rows], self.expected_rows()
+        )
+
+    def test_failed_edition_is_left_out(self):
+        with open(os.path.join(self.pdf_directory, '2099_02.pdf'), 'wb') as file:
+            file.write(b'not a PDF')
+        result, rows = self.export('jsonl')
+        self.assertEqual(result, {'rows': len(self.expected_rows()), 'failed': ['2099_02.pdf']})
+        self.assertEqual({row['edition'] for row in rows}, {EDITION})
+
+    def test_unknown_edition_is_rejected_before_writing(self):
+        with self.assertRaises(ValueError):
+            self.export('csv', editions=[EDITION, '2099_02.pdf'])
+        with open(os.path.join(self.pdf_directory, 'outline.csv')) as output:
+            self.assertEqual(output.read(), '')
+
+
+def wait_for(condition, timeout=10):
+    """
+    Waits until condition() is true, failing after timeout seconds.
+    """
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out waiting for the background work")
+        time.sleep(0.01)
+
+
+class EditionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pdf_directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.pdf_directory, EDITION)
+        self.write(b'first version')
+        # Loading the "outline" (the file's content) waits for this event, to observe the pending state
+        self.loading = threading.Event()
+        self.loading.set()
+        self.index = EditionIndex(self.pdf_directory, self.load_outline)
+
+    def tearDown(self):
+        self.loading.set()
+        shutil.rmtree(self.pdf_directory)
+
+    def write(self, content):
+        with open(self.path, 'wb') as file:
+            file.write(content)
+
+    def load_outline(self, pdf_path):
+        self.loading.wait()
+        with open(pdf_path, 'rb') as file:
+            return file.read()
+
+    def status(self, edition=EDITION):
+        entry = self.index.get(edition)
+        return entry['status'] if entry else None
+
+    def test_new_edition_is_pending_then_ready(self):
+        self.loading.clear()
+        self.index.scan()
+        self.assertEqual(self.status(), 'pending')
+        self.loading.set()
+        wait_for(lambda: self.status() == 'ready')
+        self.assertEqual(self.index.get(EDITION)['outline'], b'first version')
+
+    def test_changed_edition_serves_previous_outline_until_indexed(self):
+        self.index.load(EDITION)
+        self.write(b'second, longer version')
+        self.loading.clear()
+        self.index.scan()
+        self.assertEqual(self.status(), 'ready')
+        self.assertEqual(self.index.get(EDITION)['outline'], b'first version')
+        self.loading.set()
+        wait_for(lambda: self.index.get(EDITION)['outline'] == b'second, longer version')
+
+    def test_deleted_edition_is_dropped(self):
+        self.index.load(EDITION)
+        os.remove(self.path)
+        self.index.scan()
+        self.assertIsNone(self.index.get(EDITION))
+
+    def test_require_starts_indexing(self):
+        self.loading.clear()
+        self.assertEqual(self.index.require(EDITION)['status'], 'pending')
+        self.loading.set()
+        wait_for(lambda: self.status() == 'ready')
+        self.assertIsNone(self.index.require('2099_02.pdf'))
+
+    def test_badly_named_pdfs_are_ignored(self):
+        shutil.copy(self.path, os.path.join(self.pdf_directory, 'Blue_Book_01_2099.pdf'))
+        self.index.scan()
+        wait_for(lambda: self.status() == 'ready')
+        self.assertEqual([entry['edition'] for entry in self.index.entries()], [EDITION])
+        self.assertIsNone(self.index.require('Blue_Book_01_2099.pdf'))
+
+    def test_failed_download_is_retried_on_the_next_scan(self):
+        urls_file = os.path.join(self.pdf_directory, 'pdf_urls.json')
+        with open(urls_file, 'w') as file:
+            json.dump({'urls': {EDITION: 'http://example.invalid/a.pdf', '2099_02.pdf': 'http://example.invalid/b.pdf'}}, file)
+        fetches = []
+
+        def fetch(pdf_urls):
+            fetches.append(sorted(pdf_urls))
+            if len(fetches) == 1:
+                return {edition: "failed" for edition in pdf_urls}
+            for edition in pdf_urls:
+                with open(os.path.join(self.pdf_directory, edition), 'wb') as file:
+                    file.write(b'downloaded')
+            return {edition: "downloaded" for edition in pdf_urls}
+
+        index = EditionIndex(self.pdf_directory, self.load_outline, urls_file=urls_file, fetch=fetch)
+        index.scan()
+        wait_for(lambda: index._fetching.done())
+        index.scan()
+        wait_for(lambda: index._fetching.done())
+        self.assertEqual(fetches, [['2099_02.pdf'], ['2099_02.pdf']])
+        # Once every listed edition is on disk, the downloads are indexed and nothing is fetched again
+        index.scan()
+        index.scan()
+        self.assertEqual(len(fetches), 2)
+        wait_for(lambda: (index.get('2099_02.pdf') or {}).get('status') == 'ready')
+
+
+def outline_with(*sections):
+    """
+    Returns an outline with one part holding the given (section number, title, subsection titles).
+    """
+    return [{
+        'title': 'DIVISION II CONSTRUCTION DETAILS', 'page_number': 1,
+        'sections': [{
+            'title': f"SECTION {number} {title}", 'section_number': number, 'page_number': 2 + offset,
+            'has_subsections': bool(subsections),
+            'subsections': [{'title': subsection, 'page_number': 2 + offset} for subsection in subsections]
+        } for offset, (number, title, subsections) in enumerate(sections)]
+    }]
+
+
+class SuggestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.old = TitleIndex('2099_01.pdf', outline_with(
+            ('401', 'BITUMINOUS CONCRETE', ['401.01 Description', '401.02 Asphalt Materials']),
+            ('403', 'ASPHALT PAVEMENT', ['403.01 Description'])
+        ))
+        self.new = TitleIndex('2099_02.pdf', outline_with(
+            ('403', 'ASPHALT PAVEMENT', ['403.01 Description', '403.02 Hot Mix Asphalt'])
+        ))
+
+    def titles(self, suggestions):
+        return [(suggestion['edition'], suggestion['title']) for suggestion in suggestions]
+
+    def test_whole_title_matches_come_first(self):
+        suggestions = suggest([self.old], 'asph')
+        self.assertEqual(self.titles(suggestions), [
+            ('2099_01.pdf', '401.02 Asphalt Materials'),
+            ('2099_01.pdf', 'SECTION 403 ASPHALT PAVEMENT')
+        ])
+        suggestions = suggest([self.old], '401.0')
+        self.assertEqual([suggestion['kind'] for suggestion in suggestions], ['subsection', 'subsection'])
+        self.assertEqual(suggestions[0]['section_number'], '401')
+        # The title starting with "section 4" precedes those only containing a word starting with it
+        self.assertEqual(self.titles(suggest([self.old], 'section 4')[:1]), [('2099_01.pdf', 'SECTION 401 BITUMINOUS CONCRETE')])
+
+    def test_editions_are_merged_in_title_order(self):
+        self.assertEqual(self.titles(suggest([self.old, self.new], '403.0')), [
+            ('2099_01.pdf', '403.01 Description'),
+            ('2099_02.pdf', '403.01 Description'),
+            ('2099_02.pdf', '403.02 Hot Mix Asphalt')
+        ])
+        # Prefixes are matched case-insensitively and with normalized whitespace
+        self.assertEqual(self.titles(suggest([self.new], '  HOT   mix')), [('2099_02.pdf', '403.02 Hot Mix Asphalt')])
+
+    def test_limit(self):
+        self.assertEqual(len(suggest([self.old, self.new], 'asph', limit=2)), 2)
+        self.assertEqual(len(suggest([self.old, self.new], 'asph')), 4)
+
+    def test_empty_prefix_suggests_nothing(self):
+        self.assertEqual(suggest([self.old, self.new], ''), [])
+        self.assertEqual(suggest([self.old, self.new], '   '), [])
+        self.assertEqual(suggest([self.old, self.new], 'zzz'), [])
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.renders = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def render(self, key, size=10):
+        def compute():
+            self.renders.append(key)
+            return key.encode('utf-8') * size
+        return compute
+
+    def disk_files(self):
+        return sorted(os.listdir(self.directory)) if os.path.exists(self.directory) else []
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        cache = RenderCache(self.directory, memory_limit=20, disk_limit=0)
+        cache.get('a', self.render('a'))
+        cache.get('b', self.render('b'))
+        # Using 'a' again makes 'b' the least recently used entry
+        cache.get('a', self.render('a'))
+        cache.get('c', self.render('c'))
+        self.assertEqual(self.renders, ['a', 'b', 'c'])
+        self.assertEqual(cache.get('a', self.render('a')), b'a' * 10)
+        cache.get('b', self.render('b'))
+        self.assertEqual(self.renders, ['a', 'b', 'c', 'b'])
+        self.assertEqual(self.disk_files(), [])
+
+    def test_disk_cache_evicts_oldest_files(self):
+        cache = RenderCache(self.directory, memory_limit=0, disk_limit=25)
+        for age, key in enumerate(['a', 'b']):
+            cache.get(key, self.render(key))
+            # Files written in the same instant are ordered explicitly, oldest first
+            path = cache._path(key)
+            os.utime(path, (1000 + age, 1000 + age))
+        cache.get('c', self.render('c'))
+        self.assertEqual(self.disk_files(), sorted(os.path.basename(cache._path(key)) for key in ['b', 'c']))
+        # Evicted entries are rendered again, the others are read back from disk
+        cache.get('b', self.render('b'))
+        cache.get('a', self.render('a'))
+        self.assertEqual(self.renders, ['a', 'b', 'c', 'a'])
+
+    def test_entries_over_the_limits_are_not_kept(self):
+        cache = RenderCache(self.directory, memory_limit=5, disk_limit=5)
+        self.assertEqual(cache.get('a', self.render('a')), b'a' * 10)
+        cache.get('a', self.render('a'))
+        self.assertEqual(self.renders, ['a', 'a'])
+        self.assertEqual(self.disk_files(), [])
+
+
+_app_directory = None
+
+
+def load_app():
+    """
+    Imports the web application once, serving a 40 page synthetic edition from a
+    temporary directory, and warms it up without the watcher.
+
+    Returns:
+    module: The app module.
+    """
+    global _app_directory
+    if _app_directory is None:
+        _app_directory = tempfile.mkdtemp()
+        make_synthetic_bluebook(os.path.join(_app_directory, EDITION), pages=40, seed=0)
+        os.environ.update(
+            BLUEBOOK_PDF_DIRECTORY=_app_directory,
+            BLUEBOOK_INDEX_DATABASE=os.path.join(_app_directory, 'index.db'),
+            BLUEBOOK_RENDER_CACHE_DIRECTORY=os.path.join(_app_directory, 'render_cache'),
+            BLUEBOOK_WARM_UP='0',
+            BLUEBOOK_WATCH_INTERVAL='0'
+        )
+        unittest.addModuleCleanup(shutil.rmtree, _app_directory)
+    import app
+    app.warm_up(watch=False)
+    return app
+
+
+class OutlineEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = load_app().app.test_client()
+
+    def get(self, **headers):
+        return self.client.get(f'/api/outline/{EDITION}', headers=headers)
+
+    def test_outline_is_revalidated_with_its_etag(self):
+        response = self.get(**{'Accept-Encoding': 'identity'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['parts'], reference.extract_outline(os.path.join(_app_directory, EDITION)))
+        etag = response.headers['ETag']
+        self.assertEqual(self.get(**{'Accept-Encoding': 'identity', 'If-None-Match': etag}).status_code, 304)
+
+    def test_gzip_body_matches_identity_body(self):
+        identity = self.get(**{'Accept-Encoding': 'identity'})
+        compressed = self.get(**{'Accept-Encoding': 'gzip'})
+        self.assertEqual(compressed.status_code, 200)
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.data), identity.data)
+        # A strong ETag identifies the exact bytes, so each coding has its own
+        self.assertNotEqual(compressed.headers['ETag'], identity.headers['ETag'])
+        revalidated = self.get(**{'Accept-Encoding': 'gzip', 'If-None-Match': identity.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 200)
+        revalidated = self.get(**{'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+
+class ExcerptEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        app = load_app()
+        cls.client = app.app.test_client()
+        cls.pdf_path = os.path.join(_app_directory, EDITION)
+        outline = reference.extract_outline(cls.pdf_path)
+        cls.section = next(section for part in outline for section in part['sections'] if section['subsections'])
+        cls.pages = reference.section_page_range(cls.pdf_path, cls.section['section_number'])
+
+    def get(self, section, **query):
+        return self.client.get(f"/excerpt/{EDITION}/{section}", query_string=query)
+
+    def test_pdf_holds_the_section_pages(self):
+        response = self.get(self.section['section_number'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        first_page, last_page = self.pages['first_page'], self.pages['last_page']
+        with fitz.open(stream=response.data, filetype='pdf') as excerpt, fitz.open(self.pdf_path) as doc:
+            self.assertEqual(excerpt.page_count, last_page - first_page + 1)
+            self.assertEqual(excerpt[0].get_text(), doc[first_page - 1].get_text())
+            self.assertEqual(excerpt[-1].get_text(), doc[last_page - 1].get_text())
+            # The section is bookmarked on the first page, and its subsections relative to it
+            expected_toc = [[1, self.pages['title'], 1]] + [
+                [2, subsection['title'], subsection['page_number'] - first_page + 1]
+                for subsection in self.section['subsections']
+                if first_page <= subsection['page_number'] <= last_page
+            ]
+            self.assertEqual(excerpt.get_toc(), expected_toc)
+
+    def test_png_page_is_revalidated_with_its_etag(self):
+        response = self.get(self.section['section_number'], format='png', page=1, dpi=36)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data.startswith(b'\x89PNG'))
+        revalidated = self.client.get(
+            f"/excerpt/{EDITION}/{self.section['section_number']}?format=png&page=1&dpi=36",
+            headers={'If-None-Match': response.headers['ETag']}
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_unknown_section_is_not_found(self):
+        self.assertEqual(self.get('999999').status_code, 404)
+
+    def test_page_outside_the_section_is_not_found(self):
+        page_count = self.pages['last_page'] - self.pages['first_page'] + 1
+        for page in (0, page_count + 1):
+            self.assertEqual(self.get(self.section['section_number'], format='png', page=page).status_code, 404)
+        self.assertEqual(self.get(self.section['section_number'], format='png', page=page_count).status_code, 200)
+
+    def test_unsupported_format_is_rejected(self):
+        self.assertEqual(self.get(self.section['section_number'], format='docx').status_code, 400)
+
+
+class PdfEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = load_app().app.test_client()
+        cls.pdf_path = os.path.join(_app_directory, EDITION)
+        cls.linearized_path = fetchBluebook.linearized_path(cls.pdf_path)
+
+    def setUp(self):
+        # Each test puts its own linearized copy in place
+        self.remove_linearized()
+        self.addCleanup(self.remove_linearized)
+        with open(self.pdf_path, 'rb') as file:
+            self.original = file.read()
+
+    def remove_linearized(self):
+        if os.path.exists(self.linearized_path):
+            os.remove(self.linearized_path)
+
+    def get(self, edition=EDITION, **headers):
+        # Closing the response closes the served file
+        with self.client.get(f'/pdf/{edition}', headers=headers) as response:
+            response.get_data()
+            return response
+
+    def write_linearized(self, content, mtime_ns):
+        os.makedirs(os.path.dirname(self.linearized_path), exist_ok=True)
+        with open(self.linearized_path, 'wb') as file:
+            file.write(content)
+        os.utime(self.linearized_path, ns=(mtime_ns, mtime_ns))
+
+    def test_range_request_is_partial(self):
+        response = self.get(Range='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], f"bytes 0-99/{len(self.original)}")
+        self.assertEqual(response.data, self.original[:100])
+
+    def test_current_linearized_copy_is_served(self):
+        self.write_linearized(b'%PDF linearized copy', os.stat(self.pdf_path).st_mtime_ns)
+        self.assertEqual(self.get().data, b'%PDF linearized copy')
+
+    def test_stale_linearized_copy_is_not_served(self):
+        # The original has been replaced since the copy was written
+        self.write_linearized(b'%PDF linearized copy', os.stat(self.pdf_path).st_mtime_ns - 10 ** 9)
+        self.assertEqual(self.get().data, self.original)
+
+    def test_unknown_edition_is_not_found(self):
+        self.assertEqual(self.get('2099_02.pdf').status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
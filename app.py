@@ -1,33 +1,58 @@
 import os
 import sys
+import gzip
+import json
+import time
+import pstats
+import cProfile
+import hashlib
+import threading
 import subprocess
 
 # Path to the batch script
 SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openvenv.bat')
 
-# Check if the script is running within the virtual environment
-if os.getenv('VIRTUAL_ENV'):
-    print("Running inside the virtual environment.")
-    print(f"Virtual environment path: {os.getenv('VIRTUAL_ENV')}")
-else:
-    print("Not running inside the virtual environment.")
-    print("Attempting to activate the virtual environment...")
+def ensure_virtual_environment():
+    """
+    Check if the script is running within the virtual environment. If not, re-launch
+    it through the batch script that activates the virtual environment.
+    """
+    if os.getenv('VIRTUAL_ENV'):
+        print("Running inside the virtual environment.")
+        print(f"Virtual environment path: {os.getenv('VIRTUAL_ENV')}")
+    else:
+        print("Not running inside the virtual environment.")
+        print("Attempting to activate the virtual environment...")
 
-    # Execute the batch script to activate the virtual environment and run the app
-    subprocess.run([SCRIPT_PATH])
+        # Execute the batch script to activate the virtual environment and run the app
+        subprocess.run([SCRIPT_PATH])
 
-    # Exit to prevent the rest of the script from running outside the venv
-    sys.exit(0)
+        # Exit to prevent the rest of the script from running outside the venv
+        sys.exit(0)
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, send_from_directory, url_for
 from datetime import datetime
-from reference import extract_part, extract_section, extract_subsection
+from reference import (
+    extract_outline, section_page_range, extract_pages_pdf, render_page_png
+)
+import outline_index
+import metrics
+from edition_index import EditionIndex, DEFAULT_INTERVAL, EDITION_NAME
+from render_cache import RenderCache
+from title_index import TitleIndex, suggest
+
+# Brotli is optional; outline responses fall back to gzip without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Path to the PDF directory
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
-PDF_DIRECTORY = os.path.join(PROJECT_DIR, 'bluebook_pdfs')
+PDF_DIRECTORY = os.environ.get('BLUEBOOK_PDF_DIRECTORY', os.path.join(PROJECT_DIR, 'bluebook_pdfs'))
 STATIC_DIRECTORY = os.path.join(PROJECT_DIR, 'static')
 REQUIREMENTS_FILE = os.path.join(PROJECT_DIR, 'requirements.txt')
+PROFILE_DIRECTORY = os.path.join(PROJECT_DIR, 'profiles')
 
 def install(package):
     subprocess.check_call([sys.executable, "-m", "pip", "install", package])
@@ -57,13 +82,15 @@ def check_and_fetch_bluebooks():
     """
     if not os.path.exists(PDF_DIRECTORY):
         print("'bluebook_pdfs' directory does not exist. Fetching Bluebooks...")
-        try:
-            subprocess.run([sys.executable, 'fetchBluebook.py'], check=True)
-            print("Bluebooks fetched successfully.")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to fetch Bluebooks: {e}")
+        # Imported here because requests may only have been installed by check_and_install_dependencies
+        from fetchBluebook import fetch_bluebooks
+        results = fetch_bluebooks(pdf_directory=PDF_DIRECTORY)
+        # An empty result means another worker is fetching; the watcher picks up its downloads
+        if results and all(result == "failed" for result in results.values()):
+            print(f"Failed to fetch Bluebooks: {results}")
             return False
+        print("Bluebooks fetched successfully.")
+        return True
     else:
         print("Bluebooks are already available.")
         return True
@@ -80,67 +107,275 @@ def setup_application():
     
     return True
 
-app = Flask(__name__)
+def load_pdf_urls():
+    """
+    Loads the mapping of Bluebook file names to their URLs on the RIDOT website.
+    """
+    with open(os.path.join(STATIC_DIRECTORY, 'pdf_urls.json'), 'r') as file:
+        return json.load(file)['urls']
+
+def edition_display_name(file):
+    """
+    Returns the display name of an edition, e.g. "February, 2024 RIDOT Bluebook" for "2024_02.pdf".
+    """
+    year, month = file.split('_')
+    month_name = datetime.strptime(month[:-4], '%m').strftime('%B')
+    return f"{month_name}, {year} RIDOT Bluebook"
+
+def list_editions(pdf_directory=PDF_DIRECTORY):
+    """
+    Lists the Bluebook PDFs with their display names, newest edition first.
+
+    Args:
+    pdf_directory (str): Directory containing the Bluebook PDFs.
+
+    Returns:
+    list: A list of dictionaries containing the display name and file name of each edition.
+    """
+    pdf_files_info = []
+    for file in sorted(os.listdir(pdf_directory), reverse=True):
+        if file.endswith('.pdf') and not EDITION_NAME.match(file):
+            print(f"Ignoring {file}: Bluebook file names must look like YYYY_MM.pdf")
+        elif file.endswith('.pdf'):
+            pdf_files_info.append({'name': edition_display_name(file), 'file': file})
+    return pdf_files_info
+
+def load_outline(pdf_path):
+    """
+    Returns the Part -> Section -> Subsection tree of an edition, from the index
+    database when it is up to date and from the PDF otherwise.
+    """
+    outline = outline_index.query_outline(pdf_path)
+    if outline is None:
+        outline = extract_outline(pdf_path)
+    return outline
+
+def index_edition(pdf_path):
+    """
+    Loads the outline of an edition for the live index, and writes a linearized copy
+    of its PDF unless an up-to-date one exists, e.g. for a PDF copied in by hand.
+    """
+    outline = load_outline(pdf_path)
+    from fetchBluebook import linearize_pdf
+    linearize_pdf(pdf_path)
+    return outline
+
+def fetch_editions(pdf_urls):
+    """
+    Downloads the given {file name: URL} Bluebooks into the PDF directory.
+    """
+    from fetchBluebook import fetch_bluebooks
+    return fetch_bluebooks(pdf_urls, pdf_directory=PDF_DIRECTORY)
+
+# Live outlines of every edition, kept up to date by a background watcher
+edition_index = EditionIndex(
+    PDF_DIRECTORY, index_edition, urls_file=os.path.join(STATIC_DIRECTORY, 'pdf_urls.json'), fetch=fetch_editions
+)
+
+# Seconds between checks for new or changed Bluebooks; 0 disables the watcher
+WATCH_INTERVAL = float(os.environ.get('BLUEBOOK_WATCH_INTERVAL', DEFAULT_INTERVAL))
+
+# Progress of the one-time startup work, reported by /readyz
+warm_up_status = {
+    'state': 'pending',  # pending -> setup -> warming -> ready, or failed
+    'editions_total': 0,
+    'editions_warmed': 0,
+    'errors': {},
+    'error': None,
+    'started_at': None,
+    'finished_at': None
+}
+_warm_up_lock = threading.Lock()
+
+def start_watcher():
+    """
+    Starts the background watcher that keeps the editions up to date, unless BLUEBOOK_WATCH_INTERVAL is 0.
+    """
+    if WATCH_INTERVAL > 0:
+        edition_index.start(WATCH_INTERVAL)
+
+def warm_up(watch=True):
+    """
+    Runs the one-time startup work: checks dependencies, fetches the Bluebooks if
+    they are missing and loads the outline of every edition, so that requests only
+    read data that is already prepared. Afterwards the watcher keeps the editions
+    up to date.
 
-@app.route('/')
+    Args:
+    watch (bool): Start the watcher once done. The gunicorn master warms up without it
+    and starts it in every worker instead, since threads do not survive a fork.
+    """
+    with _warm_up_lock:
+        if warm_up_status['state'] != 'pending':
+            return
+        warm_up_status.update(state='setup', started_at=time.time())
+
+    try:
+        if not setup_application():
+            warm_up_status.update(state='failed', finished_at=time.time())
+            return
+
+        editions = list_editions()
+        # Every edition is listed as pending right away, not only once it is loaded
+        for edition in editions:
+            edition_index.add_pending(edition['file'])
+        warm_up_status.update(state='warming', editions_total=len(editions))
+        for edition in editions:
+            entry = edition_index.load(edition['file'])
+            if entry is not None and entry['status'] == 'failed':
+                warm_up_status['errors'][edition['file']] = entry['error']
+            elif entry is not None:
+                title_index(entry)
+            warm_up_status['editions_warmed'] += 1
+        warm_up_status.update(state='ready', finished_at=time.time())
+        print("Application warm-up finished.")
+    except Exception as e:
+        # Reported by /readyz; the gunicorn master must still start its workers
+        print(f"Application warm-up failed: {e}")
+        warm_up_status.update(state='failed', error=str(e), finished_at=time.time())
+    finally:
+        # The watcher still picks up editions added or fixed after a failed warm-up
+        if watch:
+            start_watcher()
+
+def start_warm_up():
+    """
+    Starts warm_up in a background thread.
+    """
+    threading.Thread(target=warm_up, name='bluebook-warm-up', daemon=True).start()
+
+def edition_path(edition):
+    """
+    Returns the path to an edition's PDF, or None if there is no such edition.
+
+    Args:
+    edition (str): File name of the edition, e.g. "2024_02.pdf".
+    """
+    if not edition or edition != os.path.basename(edition) or not edition.endswith('.pdf'):
+        return None
+    pdf_path = os.path.join(PDF_DIRECTORY, edition)
+    return pdf_path if os.path.isfile(pdf_path) else None
+
+def pending_response(edition):
+    """
+    Returns the response for an edition that cannot be served yet, or None if it is ready.
+
+    Args:
+    edition (str): File name of the edition.
+    """
+    entry = edition_index.require(edition) if edition_path(edition) is not None else None
+    if entry is None:
+        return jsonify({'error': f"Unknown Bluebook edition '{edition}'"}), 404
+    if entry['status'] == 'pending':
+        response = jsonify({'edition': edition, 'status': 'pending'})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
+    if entry['status'] == 'failed':
+        return jsonify({'edition': edition, 'status': 'failed', 'error': entry['error']}), 500
+    return None
+
+bluebook = Blueprint('bluebook', __name__)
+
+@bluebook.route('/')
 def index():
-    if not setup_application():
+    if warm_up_status['state'] == 'pending':
+        # Background warm-up was not started (e.g. BLUEBOOK_WARM_UP=0); start it now
+        start_warm_up()
+    if warm_up_status['state'] == 'failed':
         return "Failed to setup application. Check logs for details."
+    if warm_up_status['state'] in ('pending', 'setup'):
+        return "The Bluebooks are still being prepared. Please try again shortly.", 503
 
-    # List and prepare PDF files for display
-    pdf_files = os.listdir(PDF_DIRECTORY)
-    if pdf_files:
-        pdf_files_info = []
-        for file in pdf_files:
-            if file.endswith('.pdf'):
-                year, month = file.split('_')
-                month_name = datetime.strptime(month[:-4], '%m').strftime('%B')
-                pdf_name = f"{month_name}, {year} RIDOT Bluebook"
-                pdf_files_info.append({'name': pdf_name, 'file': file})
-        return render_template('index.html', pdf_files=pdf_files_info)
+    # Edition list kept up to date by the watcher
+    editions = [{'name': edition_display_name(entry['edition']), 'file': entry['edition']} for entry in edition_index.entries()]
+    if editions:
+        return render_template('index.html', pdf_files=editions)
     else:
         return "No PDF files found."
 
-@app.route('/get_part_titles', methods=['POST'])
+@bluebook.route('/metrics')
+def metrics_endpoint():
+    """
+    Exposes request latencies, PDF parsing counters and extraction phase timings in the Prometheus text format.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bluebook.route('/healthz')
+def healthz():
+    """
+    Liveness check: the process is up and serving requests.
+    """
+    return jsonify({'status': 'ok'})
+
+@bluebook.route('/readyz')
+def readyz():
+    """
+    Readiness check: reports warm-up progress, with status 200 once every edition is loaded.
+    """
+    return jsonify(warm_up_status), 200 if warm_up_status['state'] == 'ready' else 503
+
+def find_section(outline, section_number):
+    """
+    Returns the first section of an outline with the given number, or None if there is none.
+
+    Args:
+    outline (list): An edition's outline as returned by reference.extract_outline.
+    section_number (str): The number of the section, e.g. "403".
+    """
+    for part in outline:
+        for section in part['sections']:
+            if section['section_number'] == section_number:
+                return section
+    return None
+
+@bluebook.route('/get_part_titles', methods=['POST'])
 def get_part_titles():
     pdf_file = request.form.get('pdf_file')
-    pdf_path = os.path.join(PDF_DIRECTORY, pdf_file)
-    parts = extract_part(pdf_path)
-    return jsonify(parts)
+    pending = pending_response(pdf_file)
+    if pending is not None:
+        return pending
+    # Served from the edition's live outline; a changed PDF is re-indexed by the watcher, never in the request
+    outline = edition_index.get(pdf_file)['outline']
+    return jsonify([{'title': part['title'], 'page_number': part['page_number']} for part in outline])
 
-@app.route('/get_sections', methods=['GET'])
+@bluebook.route('/get_sections', methods=['GET'])
 def get_sections():
     """
     Endpoint to fetch sections for a selected part in a PDF.
     """
     pdf_selected = request.args.get('pdf_selected')
     part_selected = request.args.get('part_selected')
-    pdf_path = os.path.join(PDF_DIRECTORY, pdf_selected)
-
-    sections = extract_section(pdf_path, part_selected)
-
-    # Filter out sections containing "[No Subsections]"
-    filtered_sections = [section for section in sections if not section['title'].endswith('[No Subsections]')]
+    pending = pending_response(pdf_selected)
+    if pending is not None:
+        return pending
+    outline = edition_index.get(pdf_selected)['outline']
+    sections = next((part['sections'] for part in outline if part['title'] == part_selected), [])
 
     section_options = ""
-    for section in filtered_sections:
-        section_options += f"<option value='{section['page_number']}'>{section['title']}</option>"
-    
+    # Sections without subsections are left out
+    for section in sections:
+        if section['has_subsections']:
+            section_options += f"<option value='{section['page_number']}'>{section['title']}</option>"
+
     return section_options
 
-@app.route('/get_subsections', methods=['GET'])
+@bluebook.route('/get_subsections', methods=['GET'])
 def get_subsections():
     pdf_selected = request.args.get('pdf_selected')
     section_selected = request.args.get('section_selected')
-    pdf_path = os.path.join(PDF_DIRECTORY, pdf_selected)
+    pending = pending_response(pdf_selected)
+    if pending is not None:
+        return pending
 
     # Ensure the section_selected is in the correct format
     try:
         section_number = section_selected.split()[1]
-    except IndexError:
+    except (AttributeError, IndexError):
         return "Invalid section format", 400  # Return a 400 Bad Request error if format is incorrect
 
-    subsections = extract_subsection(pdf_path, section_number)
+    section = find_section(edition_index.get(pdf_selected)['outline'], section_number)
+    subsections = section['subsections'] if section is not None else []
 
     subsection_options = ""
     for subsection in subsections:
@@ -148,16 +383,302 @@ def get_subsections():
 
     return subsection_options
 
-@app.route('/pdf_urls.json')
+@bluebook.route('/search', methods=['GET'])
+def search():
+    """
+    Endpoint to search the text of every indexed Bluebook edition.
+    Words must all appear on a page; text in double quotes is matched as a phrase.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': "Missing search query 'q'"}), 400
+    limit = min(max(request.args.get('k', 10, type=int), 1), 100)
+
+    hits = outline_index.search(query, limit=limit, edition=request.args.get('edition') or None)
+    if hits is None:
+        return jsonify({'error': "Search index has not been built. Run 'python reference.py build-index'."}), 503
+
+    urls = load_pdf_urls()
+    for hit in hits:
+        hit['url'] = f"{url_for('bluebook.serve_pdf', edition=hit['edition'])}#page={hit['page_number']}"
+        if hit['edition'] in urls:
+            hit['source_url'] = f"{urls[hit['edition']]}#page={hit['page_number']}"
+    return jsonify({'query': query, 'results': hits})
+
+@bluebook.route('/api/compare', methods=['GET'])
+def api_compare():
+    """
+    Endpoint listing what changed in a section between two editions, e.g.
+    /api/compare?section=403&from=2023_08.pdf&to=2024_02.pdf. "to" defaults to the newest
+    indexed edition and "from" to the edition it is compared against in pdf_urls.json.
+    """
+    section_number = request.args.get('section', '').strip()
+    if not section_number:
+        return jsonify({'error': "Missing section number 'section'"}), 400
+    editions = outline_index.indexed_editions()
+    if editions is None:
+        return jsonify({'error': "Comparison index has not been built. Run 'python reference.py build-index'."}), 503
+
+    to_edition = request.args.get('to') or (editions[-1] if editions else None)
+    if to_edition is None:
+        return jsonify({'error': "Missing edition 'to'; no Bluebook edition is indexed"}), 400
+    if to_edition not in editions:
+        return jsonify({'error': f"Unknown edition '{to_edition}' for 'to'; it is not indexed"}), 400
+    from_edition = request.args.get('from')
+    if not from_edition:
+        earlier = dict((to, source) for source, to in outline_index.load_comparisons())
+        from_edition = earlier.get(to_edition)
+        if from_edition is None and editions.index(to_edition) > 0:
+            from_edition = editions[editions.index(to_edition) - 1]
+        if from_edition is None:
+            return jsonify({'error': f"Missing edition 'from'; there is no earlier edition to compare {to_edition} with"}), 400
+    if from_edition not in editions:
+        return jsonify({'error': f"Unknown edition '{from_edition}' for 'from'; it is not indexed"}), 400
+
+    comparison = outline_index.compare_section(section_number, from_edition, to_edition)
+    if not comparison['subsections']:
+        return jsonify({'error': f"Section '{section_number}' not found in {from_edition} or {to_edition}"}), 404
+    return jsonify({'section': section_number, 'from': from_edition, 'to': to_edition, **comparison})
+
+# Typeahead indexes of the editions' titles, keyed by edition file name
+_title_indexes = {}
+
+def title_index(entry):
+    """
+    Returns the typeahead index of a ready edition, rebuilding it only when the edition is re-indexed.
+    """
+    cached = _title_indexes.get(entry['edition'])
+    if cached is None or cached[0] != entry['signature']:
+        cached = (entry['signature'], TitleIndex(entry['edition'], entry['outline']))
+        _title_indexes[entry['edition']] = cached
+    return cached[1]
+
+@bluebook.route('/api/suggest', methods=['GET'])
+def api_suggest():
+    """
+    Endpoint suggesting part, section and subsection titles with a word starting with
+    the given prefix, e.g. /api/suggest?prefix=403.0 or /api/suggest?prefix=asph&edition=2024_02.pdf.
+    """
+    prefix = request.args.get('prefix', '')
+    limit = min(max(request.args.get('k', 10, type=int), 1), 50)
+    edition = request.args.get('edition')
+    if edition:
+        pending = pending_response(edition)
+        if pending is not None:
+            return pending
+        entries = [edition_index.get(edition)]
+    else:
+        entries = [entry for entry in edition_index.entries() if entry['status'] == 'ready']
+
+    suggestions = suggest([title_index(entry) for entry in entries], prefix, limit=limit)
+    for suggestion in suggestions:
+        suggestion['url'] = f"{url_for('bluebook.serve_pdf', edition=suggestion['edition'])}#page={suggestion['page_number']}"
+    return jsonify({'prefix': prefix, 'suggestions': suggestions})
+
+# Serialized and compressed /api/outline bodies, keyed by edition file name
+_outline_responses = {}
+
+def _outline_response(entry):
+    """
+    Returns the encoded outline of an edition and its ETag, rebuilding them only when the edition is re-indexed.
+    """
+    edition = entry['edition']
+    cached = _outline_responses.get(edition)
+    if cached is not None and cached['signature'] == entry['signature']:
+        return cached
+
+    body = json.dumps({'edition': edition, 'parts': entry['outline']}, separators=(',', ':')).encode('utf-8')
+    cached = {
+        'signature': entry['signature'],
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'encodings': {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+    }
+    if brotli is not None:
+        cached['encodings']['br'] = brotli.compress(body)
+    _outline_responses[edition] = cached
+    return cached
+
+@bluebook.route('/api/outline/<edition>')
+def api_outline(edition):
+    """
+    Endpoint returning the complete Part -> Section -> Subsection tree of an edition as JSON,
+    so the frontend can fill all three dropdowns from a single request.
+    """
+    pending = pending_response(edition)
+    if pending is not None:
+        return pending
+
+    cached = _outline_response(edition_index.get(edition))
+    encoding = request.accept_encodings.best_match(list(cached['encodings']), default='identity')
+    # Every content coding is a different byte sequence, so each gets its own strong ETag
+    etag = cached['etag'] if encoding == 'identity' else f"{cached['etag']}-{encoding}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(cached['encodings'][encoding], mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# Rendered section excerpts, kept in memory and in the shared disk cache
+render_cache = RenderCache()
+
+# Resolutions allowed for page images, in dots per inch
+EXCERPT_DPI_RANGE = (36, 200)
+EXCERPT_DEFAULT_DPI = 110
+
+def _render_section_pdf(pdf_path, section, pages):
+    """
+    Copies a section's pages into a standalone PDF, bookmarking the section and its subsections.
+    """
+    first_page = pages['first_page']
+    toc = [[1, pages['title'], 1]]
+    for subsection in section['subsections']:
+        if first_page <= subsection['page_number'] <= pages['last_page']:
+            toc.append([2, subsection['title'], subsection['page_number'] - first_page + 1])
+    return extract_pages_pdf(pdf_path, first_page, pages['last_page'], toc)
+
+@bluebook.route('/excerpt/<edition>/<section>')
+def excerpt(edition, section):
+    """
+    Endpoint returning only the pages of one section of an edition, so readers do not
+    have to download the whole Bluebook. By default the pages are returned as a PDF;
+    with format=png a single page (page=N, counted from the start of the section) is
+    returned as an image of the given dpi.
+    """
+    pending = pending_response(edition)
+    if pending is not None:
+        return pending
+    pdf_path = edition_path(edition)
+    # Checked against the outline first, so unknown sections are never parsed or cached
+    outline_section = find_section(edition_index.get(edition)['outline'], section)
+    pages = section_page_range(pdf_path, section) if outline_section is not None else None
+    if pages is None:
+        return jsonify({'error': f"Section '{section}' not found in {edition}"}), 404
+
+    output_format = request.args.get('format', 'pdf')
+    stat = os.stat(pdf_path)
+    key = f"{edition}:{stat.st_mtime_ns}:{stat.st_size}:{section}"
+    if output_format == 'pdf':
+        key += ':pdf'
+        mimetype, filename = 'application/pdf', f"{edition[:-4]}-section-{section}.pdf"
+        render = lambda: _render_section_pdf(pdf_path, outline_section, pages)
+    elif output_format == 'png':
+        page = request.args.get('page', 1, type=int)
+        page_number = pages['first_page'] + page - 1
+        if not pages['first_page'] <= page_number <= pages['last_page']:
+            return jsonify({'error': f"Section {section} has {pages['last_page'] - pages['first_page'] + 1} pages"}), 404
+        dpi = min(max(request.args.get('dpi', EXCERPT_DEFAULT_DPI, type=int), EXCERPT_DPI_RANGE[0]), EXCERPT_DPI_RANGE[1])
+        key += f':png:{page}:{dpi}'
+        mimetype, filename = 'image/png', f"{edition[:-4]}-section-{section}-page-{page}.png"
+        render = lambda: render_page_png(pdf_path, page_number, dpi=dpi)
+    else:
+        return jsonify({'error': "Unsupported format; use 'pdf' or 'png'"}), 400
+
+    # The key changes whenever the PDF does, so it doubles as the ETag without hashing the bytes
+    etag = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(render_cache.get(key, render), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'inline; filename="{filename}"'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+@bluebook.route('/pdf/<edition>')
+def serve_pdf(edition):
+    """
+    Endpoint serving the local copy of an edition with Range, ETag and Last-Modified
+    support, so a PDF viewer opening "#page=N" only downloads the bytes it needs.
+    """
+    pdf_path = edition_path(edition)
+    if pdf_path is None:
+        return jsonify({'error': f"Unknown Bluebook edition '{edition}'"}), 404
+    from fetchBluebook import linearized_path
+    served_path = pdf_path
+    try:
+        # The linearized copy is current when it has the modification time of the original
+        if os.stat(linearized_path(pdf_path)).st_mtime_ns == os.stat(pdf_path).st_mtime_ns:
+            served_path = linearized_path(pdf_path)
+    except FileNotFoundError:
+        pass
+    response = send_from_directory(os.path.dirname(served_path), edition, mimetype='application/pdf', conditional=True, etag=True, max_age=3600)
+    # PDF viewers only switch to range requests when the full response advertises them
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+@bluebook.route('/pdf_urls.json')
 def pdf_urls():
     return send_from_directory(STATIC_DIRECTORY, 'pdf_urls.json')
 
+def start_request_metrics():
+    """
+    Starts timing the request, and profiles it when profiling is enabled and the
+    request carries the "X-Bluebook-Profile: 1" header.
+    """
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+    if current_app.config['PROFILING'] and request.headers.get('X-Bluebook-Profile') == '1':
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+def finish_request_metrics(response):
+    """
+    Records the request latency, adds the Server-Timing header when enabled and
+    saves the profile of a profiled request.
+    """
+    duration = time.perf_counter() - g.pop('request_start', time.perf_counter())
+    phases = metrics.finish_request()
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.REQUEST_DURATION.observe(duration, method=request.method, route=route, status=response.status_code)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(PROFILE_DIRECTORY, exist_ok=True)
+        profile_name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{route.replace('/', '_').replace('<', '').replace('>', '')}.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIRECTORY, profile_name))
+        print(f"Profile of {request.method} {request.path} saved to profiles/{profile_name}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+        response.headers['X-Bluebook-Profile'] = profile_name
+
+    if current_app.config['SERVER_TIMING']:
+        timings = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in phases.items()]
+        timings.append(f"total;dur={duration * 1000:.1f}")
+        response.headers['Server-Timing'] = ', '.join(timings)
+    return response
+
+def create_app(warm_up=True):
+    """
+    Creates the Flask application.
+
+    Args:
+    warm_up (bool): Start the one-time startup work in the background.
+
+    Returns:
+    Flask: The application.
+    """
+    app = Flask(__name__)
+    # Server-Timing headers and per-request profiling are opt-in
+    app.config['SERVER_TIMING'] = os.environ.get('BLUEBOOK_SERVER_TIMING') == '1'
+    app.config['PROFILING'] = os.environ.get('BLUEBOOK_PROFILING') == '1'
+    app.register_blueprint(bluebook)
+    app.before_request(start_request_metrics)
+    app.after_request(finish_request_metrics)
+    if warm_up:
+        start_warm_up()
+    return app
+
+if __name__ == "__main__":
+    # Checked before the app is created, since it may re-launch the script and exit
+    ensure_virtual_environment()
+
+app = create_app(warm_up=os.environ.get('BLUEBOOK_WARM_UP', '1') != '0')
+
 if __name__ == "__main__":
     print("Starting the Flask application...")
     app.run(debug=True)
-
-    if setup_application():
-        print("Application setup successfully.")
-        app.run(debug=True)
-    else:
-        print("Application setup failed.")
@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+This python file keeps the live, in-memory outline of every Bluebook edition the
+web application serves. A background thread polls the 'bluebook_pdfs' directory
+and pdf_urls.json: new or changed PDFs are indexed off the request thread and
+swapped into the live index once complete, and editions newly listed in
+pdf_urls.json are downloaded. Until an edition has been indexed its status is
+"pending", so requests never wait on a PDF parse.
+"""
+
+# Seconds between two polls of the PDF directory and pdf_urls.json
+DEFAULT_INTERVAL = 30
+
+# File name of an edition, "YYYY_MM.pdf"; other PDFs in the directory are ignored
+EDITION_NAME = re.compile(r'^\d{4}_\d{2}\.pdf$')
+
+
+def _signature(path):
+    """
+    Returns the modification time (ns) and size of a file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class EditionIndex:
+    """
+    The outlines of the Bluebook editions, keyed by file name (e.g. "2024_02.pdf").
+
+    Each entry is a dictionary with the edition's status ("pending", "ready" or
+    "failed"), the file signature it was indexed from, its outline and any error.
+    Entries are never modified in place: every change publishes a new dictionary
+    of entries, so readers always see a consistent snapshot without locking.
+    """
+
+    def __init__(self, pdf_directory, load_outline, urls_file=None, fetch=None):
+        """
+        Args:
+        pdf_directory (str): Directory containing the Bluebook PDFs.
+        load_outline (callable): Returns the outline of the PDF at the given path.
+        urls_file (str): pdf_urls.json, watched for newly listed editions.
+        fetch (callable): Downloads the given {file name: URL} editions into pdf_directory.
+        """
+        self.pdf_directory = pdf_directory
+        self.urls_file = urls_file
+        self._load_outline = load_outline
+        self._fetch = fetch
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._scheduled = {}
+        self._executors = {}
+        self._executors_pid = None
+        self._urls_signature = None
+        self._fetching = None
+        self._ignored = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, edition):
+        """
+        Returns the entry of an edition, or None if it has never been seen.
+        """
+        return self._entries.get(edition)
+
+    def entries(self):
+        """
+        Returns every entry, newest edition first.
+        """
+        return [self._entries[edition] for edition in sorted(self._entries, reverse=True)]
+
+    def require(self, edition):
+        """
+        Returns the entry of an edition if it is ready to serve. If the PDF exists but
+        has not been indexed yet, indexing is started in the background.
+
+        Args:
+        edition (str): File name of the edition.
+
+        Returns:
+        dict: The entry, or None if there is no such edition.
+        """
+        entry = self._entries.get(edition)
+        if entry is None:
+            if not EDITION_NAME.match(edition):
+                return None
+            signature = _signature(os.path.join(self.pdf_directory, edition))
+            if signature is None:
+                return None
+            return self.schedule(edition, signature)
+        return entry
+
+    def add_pending(self, edition):
+        """
+        Publishes a pending entry for an edition that has no entry yet, without
+        indexing it, so it is listed while the caller loads it.
+
+        Returns:
+        dict: The edition's entry, or None if its PDF does not exist.
+        """
+        signature = _signature(os.path.join(self.pdf_directory, edition))
+        if signature is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(edition)
+            if entry is None:
+                entry = {'edition': edition, 'status': 'pending', 'signature': signature, 'outline': None, 'error': None}
+                entries = dict(self._entries)
+                entries[edition] = entry
+                self._entries = entries
+        return entry
+
+    def clear(self):
+        """
+        Forgets every indexed edition.
+        """
+        with self._lock:
+            self._entries = {}
+            self._scheduled = {}
+
+    def _publish(self, edition, entry):
+        """
+        Atomically replaces (or with entry None, removes) the entry of an edition.
+        """
+        with self._lock:
+            entries = dict(self._entries)
+            if entry is None:
+                entries.pop(edition, None)
+            else:
+                entries[edition] = entry
+            self._entries = entries
+
+    def _submit(self, pool, function, *args):
+        """
+        Runs function in the named single-thread pool, so slow downloads never hold up indexing.
+        """
+        # Thread pools do not survive a fork, so a forked worker starts its own
+        if self._executors_pid != os.getpid():
+            self._executors = {}
+            self._executors_pid = os.getpid()
+        if pool not in self._executors:
+            self._executors[pool] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'bluebook-{pool}')
+        return self._executors[pool].submit(function, *args)
+
+    def schedule(self, edition, signature):
+        """
+        Starts indexing an edition in the background. An edition that is already
+        being served keeps serving its previous outline until the new one is ready.
+
+        Returns:
+        dict: The edition's current entry.
+        """
+        with self._lock:
+            if self._scheduled.get(edition) == signature:
+                return self._entries.get(edition)
+            self._scheduled[edition] = signature
+        entry = self._entries.get(edition)
+        if entry is None or entry['status'] != 'ready':
+            entry = {'edition': edition, 'status': 'pending', 'signature': signature, 'outline': None, 'error': None}
+            self._publish(edition, entry)
+        self._submit('index', self.load, edition)
+        return entry
+
+    def load(self, edition):
+        """
+        Indexes an edition on the calling thread and swaps it into the live index.
+
+        Returns:
+        dict: The edition's new entry.
+        """
+        pdf_path = os.path.join(self.pdf_directory, edition)
+        signature = _signature(pdf_path)
+        if signature is None:
+            self._publish(edition, None)
+            return None
+        try:
+            entry = {
+                'edition': edition,
+                'status': 'ready',
+                'signature': signature,
+                'outline': self._load_outline(pdf_path),
+                'error': None,
+                'indexed_at': time.time()
+            }
+            print(f"Indexed Bluebook: {edition}")
+        except Exception as e:
+            print(f"Failed to index Bluebook {edition}: {e}")
+            entry = {'edition': edition, 'status': 'failed', 'signature': signature, 'outline': None, 'error': str(e)}
+        with self._lock:
+            self._scheduled.pop(edition, None)
+        self._publish(edition, entry)
+        return entry
+
+    def scan(self):
+        """
+        Compares the PDF directory and pdf_urls.json with the live index: indexes new
+        or changed PDFs, drops deleted ones and downloads newly listed editions.
+        """
+        on_disk = {}
+        if os.path.isdir(self.pdf_directory):
+            for file in os.listdir(self.pdf_directory):
+                if file.endswith('.pdf') and not EDITION_NAME.match(file):
+                    if file not in self._ignored:
+                        self._ignored.add(file)
+                        print(f"Ignoring {file}: Bluebook file names must look like YYYY_MM.pdf")
+                elif file.endswith('.pdf'):
+                    signature = _signature(os.path.join(self.pdf_directory, file))
+                    if signature is not None:
+                        on_disk[file] = signature
+
+        for edition, signature in on_disk.items():
+            entry = self._entries.get(edition)
+            if entry is None or entry['signature'] != signature:
+                self.schedule(edition, signature)
+        for edition in set(self._entries) - set(on_disk):
+            print(f"Removed Bluebook: {edition}")
+            self._publish(edition, None)
+
+        urls_signature = _signature(self.urls_file) if self.urls_file else None
+        # A fetch started before a fork never finishes in the child
+        fetching = self._fetching is not None and not self._fetching.done() and self._executors_pid == os.getpid()
+        if urls_signature is not None and urls_signature != self._urls_signature and self._fetch is not None and not fetching:
+            with open(self.urls_file, 'r') as file:
+                urls = json.load(file)['urls']
+            missing = {edition: url for edition, url in urls.items() if edition not in on_disk}
+            if missing:
+                print(f"Fetching newly listed Bluebooks: {', '.join(sorted(missing))}")
+                # The downloaded files are picked up by the next scan, and failed downloads are retried by it
+                self._fetching = self._submit('fetch', self._fetch, missing)
+            else:
+                # Only once every listed edition is on disk is the file not checked again until it changes
+                self._urls_signature = urls_signature
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Failed to scan for Bluebook changes: {e}")
+
+    def start(self, interval=DEFAULT_INTERVAL):
+        """
+        Starts polling for changes every interval seconds in a background thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name='bluebook-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the polling thread.
+        """
+        self._stop.set()
@@ -1,39 +1,75 @@
 import os
-import requests
-from urllib.parse import urlparse
 import re
 import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from urllib.parse import urlparse
+
+import fitz
+import requests
+from requests.adapters import HTTPAdapter
+
+# File locks are only available on POSIX; elsewhere concurrent fetches are not prevented
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 """
-This python file will download the files of the links provided, 
+This python file will download the files of the links provided,
 In this case the Bluebook Archives on the RIDOT Website, and will
 save them to a folder in the directory it resides in, and will also
 rename the files to "YYYY_MM" format. To be distinguished by the other
-pages. This page is made to only to fetch the PDF files for further 
+pages. This page is made to only to fetch the PDF files for further
 processing.
+
+Downloads run in a small thread pool and are streamed to a ".part" file
+that is renamed into place once complete. Editions that have not changed
+on the server are skipped with a conditional GET, and an interrupted
+download is resumed with a Range request the next time it runs.
+
+A linearized ("fast web view") copy of every Bluebook is written to the
+'linearized' folder, so a PDF viewer opening "#page=N" on the copy served by
+the web application only needs the bytes of that page.
 """
 
-# Function to download PDF from a URL
-def download_pdf(url):
-    # Send a GET request to the URL
-    response = requests.get(url)
-    if response.status_code == 200:  # Check if the request was successful
-        # Extract the filename from the URL
-        filename = os.path.basename(urlparse(url).path)
-        # Get the publication year and month from the filename
-        year, month = get_year_and_month(filename)
-        if year and month:  # Check if year and month were successfully extracted
-            # Create the new filename in the format YYYY_MM
-            new_filename = f"{year}_{month}"
-            # Save the PDF content to a file with the new filename
-            with open(f"bluebook_pdfs/{new_filename}.pdf", "wb") as file:
-                file.write(response.content)
-            print(f"Downloaded Bluebook: {new_filename}.pdf")
-        else:
-            print(f"Failed to extract year and month from filename: {filename}")
-    else:
-        print(f"Failed to download Bluebook from URL: {url}")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_DIRECTORY = os.environ.get('BLUEBOOK_PDF_DIRECTORY', os.path.join(PROJECT_DIR, 'bluebook_pdfs'))
+URLS_FILE = os.path.join(PROJECT_DIR, 'static', 'pdf_urls.json')
+
+# ETag / Last-Modified of every downloaded (or partially downloaded) Bluebook
+STATE_FILE = '.fetch_state.json'
+
+# Subfolder of the PDF directory holding the linearized copies
+LINEARIZED_DIRECTORY = 'linearized'
+
+# Held while fetching, so several web workers never download the same files at once
+LOCK_FILE = '.fetch.lock'
+
+MAX_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+TIMEOUT = (10, 60)  # Connect and read timeouts in seconds
+
+# Responses worth retrying; other client errors fail immediately
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+_local = threading.local()
+_state_lock = threading.Lock()
+
 
+class DownloadError(Exception):
+    """
+    Raised when a response cannot be used for the download.
+    """
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
 
 
 # Function to extract year and month from a filename
@@ -49,15 +85,303 @@ def get_year_and_month(filename):
         return "20" + match.group(2), match.group(1)
     return None, None  # Return None if year and month could not be extracted
 
-# Load PDF URLs from JSON file
-with open("pdf_urls.json", "r") as file:
-    data = json.load(file)
-pdf_urls = data["urls"]
 
-# Create a directory to store the downloaded PDFs if it doesn't exist
-if not os.path.exists("bluebook_pdfs"):
-    os.makedirs("bluebook_pdfs")
+def bluebook_filename(url):
+    """
+    Builds the "YYYY_MM.pdf" file name for a Bluebook URL.
+
+    Args:
+    url (str): URL of the Bluebook PDF.
+
+    Returns:
+    str: The file name, or None if the year and month could not be extracted.
+    """
+    filename = os.path.basename(urlparse(url).path)
+    year, month = get_year_and_month(filename)
+    if year and month:
+        return f"{year}_{month}.pdf"
+    return None
+
+
+def load_pdf_urls(urls_file=URLS_FILE):
+    """
+    Loads the Bluebook URLs from the JSON file.
+
+    Args:
+    urls_file (str): Path to the JSON file. Its "urls" entry maps file names to URLs,
+    or is a plain list of URLs whose file names are derived from the URL.
+
+    Returns:
+    dict: Maps each "YYYY_MM.pdf" file name to its URL.
+    """
+    with open(urls_file, "r") as file:
+        urls = json.load(file)["urls"]
+    if isinstance(urls, dict):
+        return dict(urls)
+    pdf_urls = {}
+    for url in urls:
+        filename = bluebook_filename(url)
+        if filename:
+            pdf_urls[filename] = url
+        else:
+            print(f"Failed to extract year and month from URL: {url}")
+    return pdf_urls
+
+
+def _session():
+    """
+    Returns this thread's HTTP session, so connections are reused between downloads.
+    """
+    if getattr(_local, 'session', None) is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return _local.session
+
+
+def _load_state(pdf_directory):
+    try:
+        with open(os.path.join(pdf_directory, STATE_FILE), "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_state(pdf_directory, state):
+    """
+    Writes the download state atomically. Must be called with _state_lock held.
+    """
+    path = os.path.join(pdf_directory, STATE_FILE)
+    with open(path + '.tmp', "w") as file:
+        json.dump(state, file, indent=4, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _update_state(pdf_directory, state, filename, entry):
+    with _state_lock:
+        state[filename] = entry
+        _save_state(pdf_directory, state)
+
+
+def _validators(response):
+    """
+    Returns the ETag and Last-Modified headers of a response.
+    """
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+def _download_once(url, filename, pdf_directory, state):
+    """
+    Makes one attempt at downloading a Bluebook, resuming a partial download if there is one.
+
+    Returns:
+    str: "downloaded" or "unchanged".
+    """
+    path = os.path.join(pdf_directory, filename)
+    partial_path = path + '.part'
+    entry = dict(state.get(filename, {}))
+    partial = entry.get('partial') or {}
+    headers = {}
+
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+    if offset and (partial.get('etag') or partial.get('last_modified')):
+        # Resume, but only if the file on the server is still the version we started downloading
+        headers['Range'] = f"bytes={offset}-"
+        headers['If-Range'] = partial.get('etag') or partial.get('last_modified')
+    else:
+        offset = 0
+        if os.path.exists(path):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            headers['If-Modified-Since'] = entry.get('last_modified') or formatdate(os.path.getmtime(path), usegmt=True)
+
+    with _session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 304:
+            return "unchanged"
+        if response.status_code == 416:
+            # The partial file is not a prefix of the current version; start over
+            os.remove(partial_path)
+            raise DownloadError(f"Range not satisfiable for {filename}")
+        if response.status_code not in (200, 206):
+            raise DownloadError(
+                f"HTTP {response.status_code} for {url}", retry=response.status_code in RETRY_STATUS_CODES
+            )
+
+        if response.status_code == 200:
+            offset = 0
+            partial = _validators(response)
+            entry['partial'] = partial
+            _update_state(pdf_directory, state, filename, entry)
+
+        expected_size = response.headers.get('Content-Length')
+        expected_size = offset + int(expected_size) if expected_size is not None else None
+        with open(partial_path, "ab" if offset else "wb") as file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                file.write(chunk)
+            size = file.tell()
+        if expected_size is not None and size != expected_size:
+            raise DownloadError(f"Incomplete download of {filename}: {size} of {expected_size} bytes")
+
+    os.replace(partial_path, path)
+    _update_state(pdf_directory, state, filename, partial)
+    return "downloaded"
+
+
+def linearized_path(pdf_path):
+    """
+    Returns the path of the linearized copy of a Bluebook PDF.
+    """
+    directory, filename = os.path.split(pdf_path)
+    return os.path.join(directory, LINEARIZED_DIRECTORY, filename)
+
+
+def linearize_pdf(pdf_path):
+    """
+    Writes a linearized copy of a Bluebook PDF unless an up-to-date one exists. The
+    copy is given the modification time of the original, which marks it as current.
+    The copy is only an optimization: on any error the original is served instead, and
+    if another process is already linearizing the same PDF this one leaves it to it.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    bool: True if an up-to-date linearized copy exists.
+    """
+    directory, filename = os.path.split(linearized_path(pdf_path))
+    try:
+        if _is_linearized(pdf_path):
+            return True
+        os.makedirs(directory, exist_ok=True)
+        # Every web worker's watcher may see a new PDF at the same time; only one linearizes it
+        with _fetch_lock(directory, f".{filename}.lock") as locked:
+            if not locked:
+                return False
+            return _is_linearized(pdf_path) or _write_linearized(pdf_path)
+    except OSError as e:
+        print(f"Failed to linearize Bluebook {os.path.basename(pdf_path)}: {e}")
+        return False
+
+
+def _is_linearized(pdf_path):
+    """
+    Returns whether the linearized copy of a Bluebook PDF exists and is up to date.
+    """
+    path = linearized_path(pdf_path)
+    return os.path.exists(path) and os.stat(path).st_mtime_ns == os.stat(pdf_path).st_mtime_ns
+
+
+def _write_linearized(pdf_path):
+    """
+    Writes the linearized copy of a Bluebook PDF through a temporary file, so a
+    partially written copy is never served.
+
+    Returns:
+    bool: True if the copy was written.
+    """
+    path = linearized_path(pdf_path)
+    source_mtime = os.stat(pdf_path).st_mtime_ns
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with fitz.open(pdf_path) as doc:
+            doc.save(temporary_path, linear=True, garbage=3, deflate=True)
+        os.utime(temporary_path, ns=(source_mtime, source_mtime))
+        os.replace(temporary_path, path)
+    except Exception as e:
+        # Newer MuPDF releases dropped linearization; the original is served instead
+        print(f"Failed to linearize Bluebook {os.path.basename(pdf_path)}: {e}")
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        return False
+    return True
+
+
+def download_pdf(url, filename, pdf_directory=PDF_DIRECTORY, state=None):
+    """
+    Downloads one Bluebook, retrying with exponential backoff on network errors.
+
+    Args:
+    url (str): URL of the Bluebook PDF.
+    filename (str): Name to save the PDF as, in "YYYY_MM.pdf" format.
+    pdf_directory (str): Directory the PDF is saved to.
+    state (dict): Shared download state; loaded from pdf_directory if not given.
+
+    Returns:
+    str: "downloaded", "unchanged" or "failed".
+    """
+    if state is None:
+        state = _load_state(pdf_directory)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            result = _download_once(url, filename, pdf_directory, state)
+        except (requests.RequestException, DownloadError) as e:
+            if (isinstance(e, DownloadError) and not e.retry) or attempt == MAX_RETRIES:
+                print(f"Failed to download Bluebook from URL: {url} ({e})")
+                return "failed"
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt)
+            continue
+        if result == "downloaded":
+            print(f"Downloaded Bluebook: {filename}")
+        else:
+            print(f"Bluebook is up to date: {filename}")
+        linearize_pdf(os.path.join(pdf_directory, filename))
+        return result
+
+
+@contextmanager
+def _fetch_lock(pdf_directory, lock_name=LOCK_FILE):
+    """
+    Takes the fetch lock of the PDF directory, or another lock file in a directory, without waiting.
+
+    Yields:
+    bool: True if the lock was taken, False if another process holds it.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(os.path.join(pdf_directory, lock_name), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def fetch_bluebooks(pdf_urls=None, pdf_directory=PDF_DIRECTORY, max_workers=MAX_WORKERS):
+    """
+    Downloads every Bluebook concurrently, skipping editions that have not changed.
+
+    Args:
+    pdf_urls (dict): Maps "YYYY_MM.pdf" file names to URLs; read from pdf_urls.json if not given.
+    pdf_directory (str): Directory the PDFs are saved to.
+    max_workers (int): Maximum number of simultaneous downloads.
+
+    Returns:
+    dict: Maps each file name to "downloaded", "unchanged" or "failed", or is empty if
+    another process is already fetching into pdf_directory.
+    """
+    if pdf_urls is None:
+        pdf_urls = load_pdf_urls()
+    # Create a directory to store the downloaded PDFs if it doesn't exist
+    os.makedirs(pdf_directory, exist_ok=True)
+    with _fetch_lock(pdf_directory) as locked:
+        if not locked:
+            print("Another process is already fetching the Bluebooks.")
+            return {}
+        state = _load_state(pdf_directory)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                filename: executor.submit(download_pdf, url, filename, pdf_directory, state)
+                for filename, url in pdf_urls.items()
+            }
+            return {filename: future.result() for filename, future in futures.items()}
+
 
-# Loop through each URL in the list and download the PDF
-for pdf_url in pdf_urls:
-    download_pdf(pdf_url)
+if __name__ == "__main__":
+    fetch_bluebooks()
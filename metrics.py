@@ -0,0 +1,164 @@
+import time
+import threading
+from contextlib import contextmanager
+
+"""
+This python file holds the in-process counters and latency histograms of the
+application and renders them in the Prometheus text format for /metrics. It
+also keeps the time spent in each extraction phase during the current request,
+which the web application can report in a Server-Timing header.
+
+Every gunicorn worker keeps its own metrics, so each scrape of /metrics shows
+the worker that happened to answer it.
+"""
+
+# Latency buckets in seconds, from cached lookups up to full-document parses
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_request_phases = threading.local()
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by labels.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Observed values (e.g. latencies in seconds) counted into cumulative buckets, optionally split by labels.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, series['buckets']):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'bluebook_request_duration_seconds', "Time spent handling HTTP requests.", ('method', 'route', 'status')
+)
+DOCUMENTS_OPENED = Counter('bluebook_documents_opened_total', "PDF documents opened with PyMuPDF.")
+PAGES_EXTRACTED = Counter('bluebook_pages_extracted_total', "PDF pages whose text was extracted.")
+CACHE_HITS = Counter('bluebook_cache_hits_total', "Extraction results served from the outline cache.", ('kind',))
+CACHE_MISSES = Counter('bluebook_cache_misses_total', "Extraction results computed because they were not cached.", ('kind',))
+RENDER_CACHE_REQUESTS = Counter(
+    'bluebook_render_cache_requests_total', "Section excerpt lookups by the cache level that answered them.", ('result',)
+)
+PHASE_DURATION = Histogram(
+    'bluebook_extraction_phase_seconds', "Time spent in each phase of the PDF outline extraction.", ('phase',)
+)
+
+
+def record_phase(phase, seconds):
+    """
+    Records time spent in an extraction phase, in the histogram and for the current request.
+
+    Args:
+    phase (str): Name of the phase, e.g. "open", "toc", "page_text" or "match".
+    seconds (float): Time spent in the phase.
+    """
+    PHASE_DURATION.observe(seconds, phase=phase)
+    phases = getattr(_request_phases, 'phases', None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(phase):
+    """
+    Times the with block as an extraction phase.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+def start_request():
+    """
+    Starts collecting the extraction phases of the current thread's request.
+    """
+    _request_phases.phases = {}
+
+
+def finish_request():
+    """
+    Stops collecting for the current thread's request.
+
+    Returns:
+    dict: Seconds spent in each phase during the request.
+    """
+    phases = getattr(_request_phases, 'phases', None) or {}
+    _request_phases.phases = None
+    return phases
+
+
+def render():
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+    str: The metrics text.
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
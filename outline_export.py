@@ -0,0 +1,175 @@
+import os
+import csv
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from reference import PDF_DIRECTORY, extract_outline, clear_cache
+
+"""
+This python file exports the outline of every Bluebook edition as one flat table,
+with a row for each part, section and subsection and the page it starts on, for
+tools that cannot use the web application. The editions are extracted in parallel
+worker processes with the same functions that serve the dropdowns, and the rows
+of each edition are written as soon as it is done, so memory use does not grow
+with the number of editions.
+
+Usage:
+    python reference.py export --format csv --output bluebook_outline.csv
+"""
+
+# Columns of the exported table, in order
+FIELDS = (
+    'edition', 'kind', 'part_title', 'section_number', 'section_title',
+    'subsection_title', 'title', 'page_number', 'has_subsections'
+)
+
+
+def _outline_rows(edition, outline):
+    """
+    Flattens an edition's outline into table rows, in outline order.
+
+    Args:
+    edition (str): File name of the edition, e.g. "2024_02.pdf".
+    outline (list): The edition's outline as returned by reference.extract_outline.
+
+    Returns:
+    list: One dictionary with the FIELDS of the table for each part, section and subsection.
+    """
+    rows = []
+    for part in outline:
+        rows.append({
+            'edition': edition, 'kind': 'part', 'part_title': part['title'], 'section_number': '',
+            'section_title': '', 'subsection_title': '', 'title': part['title'],
+            'page_number': part['page_number'], 'has_subsections': ''
+        })
+        for section in part['sections']:
+            rows.append({
+                'edition': edition, 'kind': 'section', 'part_title': part['title'],
+                'section_number': section['section_number'], 'section_title': section['title'],
+                'subsection_title': '', 'title': section['title'],
+                'page_number': section['page_number'], 'has_subsections': section['has_subsections']
+            })
+            for subsection in section['subsections']:
+                rows.append({
+                    'edition': edition, 'kind': 'subsection', 'part_title': part['title'],
+                    'section_number': section['section_number'], 'section_title': section['title'],
+                    'subsection_title': subsection['title'], 'title': subsection['title'],
+                    'page_number': subsection['page_number'], 'has_subsections': ''
+                })
+    return rows
+
+
+def _export_edition(pdf_path):
+    """
+    Worker process entry point: extracts the outline of one edition as table rows.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    list: The edition's rows, see _outline_rows.
+    """
+    try:
+        return _outline_rows(os.path.basename(pdf_path), extract_outline(pdf_path))
+    finally:
+        # A worker process handles many editions; keep only one edition's results in memory
+        clear_cache()
+
+
+def export_editions(pdf_directory=PDF_DIRECTORY, editions=None):
+    """
+    Returns the file names of the editions to export, checking that each one exists.
+
+    Args:
+    pdf_directory (str): Directory containing the Bluebook PDFs.
+    editions (list): File names of the editions to export, defaults to every PDF in pdf_directory.
+
+    Returns:
+    list: The file names.
+
+    Raises:
+    ValueError: If a given edition is not a PDF in pdf_directory.
+    """
+    available = sorted(file for file in os.listdir(pdf_directory) if file.endswith('.pdf'))
+    if editions is None:
+        return available
+    unknown = [edition for edition in editions if edition not in available]
+    if unknown:
+        raise ValueError(f"Unknown Bluebook edition(s): {', '.join(unknown)}; available: {', '.join(available) or 'none'}")
+    return list(editions)
+
+
+class _JsonLinesWriter:
+    def __init__(self, file):
+        self.file = file
+
+    def writerows(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row) + '\n')
+
+
+def export_index(output, pdf_directory=PDF_DIRECTORY, output_format='jsonl', workers=None, editions=None):
+    """
+    Writes the outline of every Bluebook in pdf_directory to output as JSON Lines or CSV.
+
+    At most one edition per worker is extracted at a time, and each edition's rows are
+    written as soon as its worker finishes, so editions appear in the order they complete.
+    The rows of one edition are always contiguous and in outline order. An edition that
+    fails to extract is reported on stderr and left out, and the others are still exported.
+
+    Args:
+    output (file): Text file to write to, opened with newline='' for CSV.
+    pdf_directory (str): Directory containing the Bluebook PDFs.
+    output_format (str): "jsonl" or "csv".
+    workers (int): Number of worker processes, defaults to one per CPU.
+    editions (list): File names of the editions to export, defaults to every PDF in pdf_directory.
+
+    Returns:
+    dict: The number of rows written ('rows') and the editions that failed ('failed').
+
+    Raises:
+    ValueError: If a given edition is not a PDF in pdf_directory, before anything is written.
+    """
+    editions = export_editions(pdf_directory, editions)
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=FIELDS)
+        writer.writeheader()
+    elif output_format == 'jsonl':
+        writer = _JsonLinesWriter(output)
+    else:
+        raise ValueError(f"Unknown export format: {output_format}")
+
+    workers = workers or os.cpu_count() or 1
+    pending_editions = iter(editions)
+    row_count = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+
+        def submit_next():
+            edition = next(pending_editions, None)
+            if edition is not None:
+                running[executor.submit(_export_edition, os.path.join(pdf_directory, edition))] = edition
+
+        # Only as many editions are submitted as there are workers, so finished but
+        # unwritten results never pile up however many editions there are
+        for _ in range(workers):
+            submit_next()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                edition = running.pop(future)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    failed.append(edition)
+                    print(f"Failed to export Bluebook {edition}: {e}", file=sys.stderr)
+                    submit_next()
+                    continue
+                writer.writerows(rows)
+                output.flush()
+                row_count += len(rows)
+                print(f"Exported Bluebook: {edition} ({len(rows)} rows)", file=sys.stderr)
+                submit_next()
+    return {'rows': row_count, 'failed': failed}
@@ -0,0 +1,689 @@
+import os
+import re
+import json
+import bisect
+import difflib
+import shutil
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from reference import (
+    PROJECT_DIR, PDF_DIRECTORY, SUBSECTION_NUMBER_LINE, CAPITAL_START,
+    extract_outline, extract_page_text, section_page_range
+)
+
+"""
+This python file keeps the precomputed outline (parts, sections and subsections)
+of every Bluebook edition in a single SQLite database. The database is written
+by "python reference.py build-index" and only read by the web application: the
+warm-up loads each up-to-date edition's outline from it instead of parsing the PDF.
+The page text of every edition is also kept in a full-text search index, and
+the text of every subsection with a content hash, from which the differences
+between editions listed in the "comp" block of pdf_urls.json are precomputed.
+"""
+
+# Path to the shared outline database
+INDEX_DATABASE = os.environ.get('BLUEBOOK_INDEX_DATABASE', os.path.join(PROJECT_DIR, 'bluebook_index.db'))
+# Its "comp" block maps an edition to the earlier edition it is compared against
+URLS_FILE = os.path.join(PROJECT_DIR, 'static', 'pdf_urls.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    edition TEXT PRIMARY KEY,
+    checksum TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parts (
+    edition TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    PRIMARY KEY (edition, position)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    edition TEXT NOT NULL,
+    part_title TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    section_number TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    has_subsections INTEGER NOT NULL,
+    PRIMARY KEY (edition, part_title, position)
+);
+CREATE TABLE IF NOT EXISTS subsections (
+    edition TEXT NOT NULL,
+    section_number TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    PRIMARY KEY (edition, section_number, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    text,
+    edition UNINDEXED,
+    page_number UNINDEXED,
+    section UNINDEXED,
+    subsection UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS subsection_text (
+    edition TEXT NOT NULL,
+    section_number TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    number TEXT NOT NULL,
+    title TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (edition, section_number, position)
+);
+CREATE TABLE IF NOT EXISTS comparisons (
+    from_edition TEXT NOT NULL,
+    to_edition TEXT NOT NULL,
+    compared_at TEXT NOT NULL,
+    PRIMARY KEY (from_edition, to_edition)
+);
+CREATE TABLE IF NOT EXISTS section_diffs (
+    from_edition TEXT NOT NULL,
+    to_edition TEXT NOT NULL,
+    section_number TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    from_number TEXT,
+    from_title TEXT,
+    to_number TEXT,
+    to_title TEXT,
+    diff TEXT,
+    PRIMARY KEY (from_edition, to_edition, section_number, position)
+);
+"""
+
+# Tables holding per-edition rows, cleared before an edition is rewritten
+EDITION_TABLES = ('parts', 'sections', 'subsections', 'page_text', 'subsection_text', 'editions')
+
+
+def file_checksum(pdf_path):
+    """
+    Computes the SHA-256 checksum of a file without reading it into memory at once.
+
+    Args:
+    pdf_path (str): Path to the file.
+
+    Returns:
+    str: The hexadecimal checksum.
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _index_edition(pdf_path, known_checksum):
+    """
+    Worker process entry point: extracts the outline of one edition unless its
+    checksum matches the one already stored in the database.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    known_checksum (str): Checksum stored for this edition, or None to always extract.
+
+    Returns:
+    dict: The edition's checksum, file signature, outline and page text (None when unchanged).
+    """
+    stat = os.stat(pdf_path)
+    checksum = file_checksum(pdf_path)
+    result = {'checksum': checksum, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'outline': None, 'page_text': None}
+    if checksum != known_checksum:
+        result['outline'] = extract_outline(pdf_path)
+        result['page_text'] = extract_page_text(pdf_path)
+        result['subsection_text'] = _subsection_text(pdf_path, result['outline'], result['page_text'])
+    return result
+
+
+def _text_checksum(text):
+    """
+    Hashes text with its whitespace normalized, so reflowed but otherwise identical text compares equal.
+    """
+    return hashlib.sha256(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+
+def _subsection_text(pdf_path, outline, page_text):
+    """
+    Splits the text of every section into its introduction and subsections.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    outline (list): The edition's outline as returned by reference.extract_outline.
+    page_text (list): The text of each page of the edition.
+
+    Returns:
+    dict: Maps each section number to a list of (number, title, text) tuples; the
+    first holds the section's own number and title and the text before its first subsection.
+    """
+    contents = {}
+    for part in outline:
+        for section in part['sections']:
+            number = section['section_number']
+            pages = section_page_range(pdf_path, number)
+            if number in contents or pages is None:
+                continue
+            lines = []
+            for page_number in range(pages['first_page'], pages['last_page'] + 1):
+                lines.extend(line.strip() for line in page_text[page_number - 1].split("\n"))
+            # Subsection headings not seen yet; each starts the text of a new entry
+            headings = [subsection['title'] for subsection in section['subsections']]
+            entries = [[number, section['title'], []]]
+            index = 0
+            while index < len(lines):
+                line = lines[index]
+                if (SUBSECTION_NUMBER_LINE.match(line) and index + 1 < len(lines)
+                        and CAPITAL_START.match(lines[index + 1])
+                        and (line + " " + lines[index + 1]).rstrip('.') in headings):
+                    # Number and title on separate lines
+                    line = line + " " + lines[index + 1]
+                    index += 1
+                if line.rstrip('.') in headings:
+                    # Headings are found in order; any skipped ones are missing from the text
+                    del headings[:headings.index(line.rstrip('.')) + 1]
+                    subsection_number, _, title = line.rstrip('.').partition(' ')
+                    entries.append([subsection_number, title, []])
+                elif line:
+                    entries[-1][2].append(line)
+                index += 1
+            contents[number] = [(entry_number, title, "\n".join(text)) for entry_number, title, text in entries]
+    return contents
+
+
+def _enclosing_headings(outline, page_count):
+    """
+    Finds the section and subsection each page belongs to, i.e. the last heading
+    that starts on or before the page.
+
+    Args:
+    outline (list): The edition's outline as returned by reference.extract_outline.
+    page_count (int): Number of pages in the edition.
+
+    Returns:
+    list: A (section title, subsection title) tuple for every page; titles are empty before the first heading.
+    """
+    sections = sorted(
+        (section for part in outline for section in part['sections']), key=lambda section: section['page_number']
+    )
+    section_pages = [section['page_number'] for section in sections]
+    headings = []
+    for page_number in range(1, page_count + 1):
+        position = bisect.bisect_right(section_pages, page_number) - 1
+        if position < 0:
+            headings.append(('', ''))
+            continue
+        section = sections[position]
+        subsection_title = ''
+        for subsection in section['subsections']:
+            if subsection['page_number'] > page_number:
+                break
+            subsection_title = subsection['title']
+        headings.append((section['title'], subsection_title))
+    return headings
+
+
+def _write_edition(connection, edition, result):
+    """
+    Replaces every stored row of an edition with its freshly extracted outline.
+    """
+    for table in EDITION_TABLES:
+        connection.execute(f"DELETE FROM {table} WHERE edition = ?", (edition,))
+    connection.execute(
+        "INSERT INTO editions VALUES (?, ?, ?, ?, ?)",
+        (edition, result['checksum'], result['mtime_ns'], result['size'], datetime.now().isoformat(timespec='seconds'))
+    )
+    for part_position, part in enumerate(result['outline']):
+        connection.execute("INSERT INTO parts VALUES (?, ?, ?, ?)", (edition, part_position, part['title'], part['page_number']))
+        for section_position, section in enumerate(part['sections']):
+            connection.execute(
+                "INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (edition, part['title'], section_position, section['title'], section['section_number'],
+                 section['page_number'], int(section['has_subsections']))
+            )
+            # The same section can be listed under several parts; store its subsections once
+            connection.executemany(
+                "INSERT OR IGNORE INTO subsections VALUES (?, ?, ?, ?, ?)",
+                [(edition, section['section_number'], position, subsection['title'], subsection['page_number'])
+                 for position, subsection in enumerate(section['subsections'])]
+            )
+    connection.executemany(
+        "INSERT INTO subsection_text VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(edition, section_number, position, number, title, _text_checksum(text), text)
+         for section_number, entries in result['subsection_text'].items()
+         for position, (number, title, text) in enumerate(entries)]
+    )
+    headings = _enclosing_headings(result['outline'], len(result['page_text']))
+    connection.executemany(
+        "INSERT INTO page_text (text, edition, page_number, section, subsection) VALUES (?, ?, ?, ?, ?)",
+        [(text, edition, page_number, *headings[page_number - 1])
+         for page_number, text in enumerate(result['page_text'], start=1)]
+    )
+
+
+def load_comparisons(urls_file=URLS_FILE):
+    """
+    Reads the editions to compare from the "comp" block of pdf_urls.json, which maps
+    an edition to the earlier edition it is compared against, e.g. {"2024_02.pdf": "2023_08.pdf"}.
+
+    Returns:
+    list: (from edition, to edition) pairs.
+    """
+    try:
+        with open(urls_file, 'r') as file:
+            comparisons = json.load(file).get('comp') or {}
+    except FileNotFoundError:
+        return []
+    return sorted((from_edition, to_edition) for to_edition, from_edition in comparisons.items())
+
+
+def _section_entries(connection, edition, section_number=None):
+    """
+    Reads the stored subsection text of an edition.
+
+    Returns:
+    dict: Maps each section number to a list of (number, title, checksum, text) tuples in order.
+    """
+    sql = "SELECT section_number, number, title, checksum, text FROM subsection_text WHERE edition = ?"
+    parameters = [edition]
+    if section_number is not None:
+        sql += " AND section_number = ?"
+        parameters.append(section_number)
+    entries = {}
+    for section, number, title, checksum, text in connection.execute(sql + " ORDER BY section_number, position", parameters):
+        entries.setdefault(section, []).append((number, title, checksum, text))
+    return entries
+
+
+def _compare_entries(from_edition, from_entries, to_edition, to_entries):
+    """
+    Aligns the subsections of a section in two editions, first by number and title,
+    then by title alone (renumbered) and then by number alone (retitled), and diffs
+    the text of those whose content changed.
+
+    Args:
+    from_edition (str): The earlier edition.
+    from_entries (list): Its (number, title, checksum, text) tuples for the section.
+    to_edition (str): The later edition.
+    to_entries (list): Its (number, title, checksum, text) tuples for the section.
+
+    Returns:
+    list: Dictionaries with the status ("unchanged", "changed", "added" or "removed"), the
+    number and title in each edition and a unified diff of the text (None unless the text changed).
+    """
+    matches = {}
+    unmatched_to = list(range(len(to_entries)))
+    for key in (lambda entry: (entry[0], entry[1]), lambda entry: entry[1], lambda entry: entry[0]):
+        candidates = {}
+        for to_index in unmatched_to:
+            candidates.setdefault(key(to_entries[to_index]), to_index)
+        for from_index, entry in enumerate(from_entries):
+            if from_index not in matches and key(entry) in candidates:
+                matches[from_index] = candidates.pop(key(entry))
+        unmatched_to = sorted(candidates.values())
+
+    # Order by position in the later edition; removed entries follow their predecessor
+    rows = []
+    previous = -1
+    for from_index, entry in enumerate(from_entries):
+        if from_index in matches:
+            previous = matches[from_index]
+            continue
+        rows.append((previous + 0.5, entry, None))
+    matched_from = {to_index: from_index for from_index, to_index in matches.items()}
+    for to_index, entry in enumerate(to_entries):
+        from_entry = from_entries[matched_from[to_index]] if to_index in matched_from else None
+        rows.append((to_index, from_entry, entry))
+    rows.sort(key=lambda row: row[0])
+
+    differences = []
+    for _, from_entry, to_entry in rows:
+        if from_entry is None:
+            status = 'added'
+        elif to_entry is None:
+            status = 'removed'
+        elif from_entry[:3] == to_entry[:3]:
+            status = 'unchanged'
+        else:
+            status = 'changed'
+        diff = None
+        if from_entry is not None and to_entry is not None and from_entry[2] != to_entry[2]:
+            diff = "\n".join(difflib.unified_diff(
+                from_entry[3].split("\n"), to_entry[3].split("\n"),
+                fromfile=f"{from_edition} {from_entry[0]}", tofile=f"{to_edition} {to_entry[0]}", lineterm='', n=2
+            ))
+        differences.append({
+            'status': status,
+            'from_number': from_entry[0] if from_entry else None,
+            'from_title': from_entry[1] if from_entry else None,
+            'to_number': to_entry[0] if to_entry else None,
+            'to_title': to_entry[1] if to_entry else None,
+            'diff': diff
+        })
+    return differences
+
+
+def _write_comparisons(connection, comparisons, updated):
+    """
+    Precomputes the differences between the given pairs of editions, skipping pairs
+    whose editions are unchanged since they were last compared.
+
+    Args:
+    connection (sqlite3.Connection): Connection to the database being built.
+    comparisons (list): (from edition, to edition) pairs to compare.
+    updated (list): Editions (re)indexed in this build.
+    """
+    indexed = {edition for edition, in connection.execute("SELECT edition FROM editions")}
+    comparisons = [(from_edition, to_edition) for from_edition, to_edition in comparisons
+                   if from_edition in indexed and to_edition in indexed]
+    existing = set(connection.execute("SELECT from_edition, to_edition FROM comparisons"))
+    for from_edition, to_edition in existing:
+        if (from_edition, to_edition) in comparisons and from_edition not in updated and to_edition not in updated:
+            continue
+        connection.execute("DELETE FROM comparisons WHERE from_edition = ? AND to_edition = ?", (from_edition, to_edition))
+        connection.execute("DELETE FROM section_diffs WHERE from_edition = ? AND to_edition = ?", (from_edition, to_edition))
+        existing.discard((from_edition, to_edition))
+
+    for from_edition, to_edition in comparisons:
+        if (from_edition, to_edition) in existing:
+            continue
+        from_sections = _section_entries(connection, from_edition)
+        to_sections = _section_entries(connection, to_edition)
+        for section_number in sorted(set(from_sections) | set(to_sections)):
+            differences = _compare_entries(
+                from_edition, from_sections.get(section_number, []), to_edition, to_sections.get(section_number, [])
+            )
+            connection.executemany(
+                "INSERT INTO section_diffs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(from_edition, to_edition, section_number, position, difference['status'],
+                  difference['from_number'], difference['from_title'], difference['to_number'], difference['to_title'],
+                  difference['diff'])
+                 for position, difference in enumerate(differences)]
+            )
+        connection.execute(
+            "INSERT INTO comparisons VALUES (?, ?, ?)",
+            (from_edition, to_edition, datetime.now().isoformat(timespec='seconds'))
+        )
+        print(f"Compared Bluebooks: {from_edition} -> {to_edition}")
+
+
+def build_index(pdf_directory=PDF_DIRECTORY, database=INDEX_DATABASE, workers=None, force=False):
+    """
+    Extracts the outline of every Bluebook in pdf_directory in parallel worker
+    processes and writes it to the index database. Editions whose checksum has not
+    changed since the last build are kept as they are unless force is set.
+
+    The database is built in a temporary copy and moved into place at the end, so
+    the web application never reads a half written index.
+
+    Args:
+    pdf_directory (str): Directory containing the Bluebook PDFs.
+    database (str): Path to the index database.
+    workers (int): Number of worker processes, defaults to one per CPU.
+    force (bool): Re-extract every edition even if it is unchanged.
+
+    Afterwards the editions paired in the "comp" block of pdf_urls.json are compared.
+
+    Returns:
+    list: The editions that were (re)indexed.
+    """
+    editions = sorted(file for file in os.listdir(pdf_directory) if file.endswith('.pdf'))
+    temp_database = database + '.tmp'
+    if os.path.exists(database):
+        shutil.copyfile(database, temp_database)
+    elif os.path.exists(temp_database):
+        os.remove(temp_database)
+
+    connection = sqlite3.connect(temp_database)
+    try:
+        connection.executescript(SCHEMA)
+        known = dict(connection.execute("SELECT edition, checksum FROM editions"))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                edition: executor.submit(
+                    _index_edition, os.path.join(pdf_directory, edition), None if force else known.get(edition)
+                )
+                for edition in editions
+            }
+            updated = []
+            for edition, future in futures.items():
+                result = future.result()
+                with connection:
+                    if result['outline'] is None:
+                        # Unchanged content; only refresh the file signature used for staleness checks
+                        connection.execute(
+                            "UPDATE editions SET mtime_ns = ?, size = ? WHERE edition = ?",
+                            (result['mtime_ns'], result['size'], edition)
+                        )
+                        print(f"Unchanged Bluebook: {edition}")
+                    else:
+                        _write_edition(connection, edition, result)
+                        updated.append(edition)
+                        print(f"Indexed Bluebook: {edition}")
+        with connection:
+            for edition in set(known) - set(editions):
+                for table in EDITION_TABLES:
+                    connection.execute(f"DELETE FROM {table} WHERE edition = ?", (edition,))
+                print(f"Removed Bluebook from index: {edition}")
+        with connection:
+            _write_comparisons(connection, load_comparisons(), updated)
+    finally:
+        connection.close()
+    os.replace(temp_database, database)
+    return updated
+
+
+# Read-only connections are kept per thread and reopened when the database file is replaced
+_local = threading.local()
+
+
+def _reset_connections():
+    """
+    Forgets the connections of the parent process in a forked child.
+    """
+    global _local
+    _local = threading.local()
+
+
+# A forked worker (e.g. gunicorn with preload_app) must not share SQLite connections with its parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_connections)
+
+
+def _connection(database=INDEX_DATABASE):
+    """
+    Returns this thread's read-only connection to the index database.
+
+    Args:
+    database (str): Path to the index database.
+
+    Returns:
+    sqlite3.Connection: The open connection, or None if the database has not been built.
+    """
+    try:
+        stat = os.stat(database)
+    except FileNotFoundError:
+        return None
+    signature = (database, stat.st_ino, stat.st_mtime_ns)
+    if getattr(_local, 'signature', None) != signature:
+        if getattr(_local, 'connection', None) is not None:
+            _local.connection.close()
+        _local.connection = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        _local.signature = signature
+    return _local.connection
+
+
+def _indexed_edition(pdf_path, database):
+    """
+    Returns the connection and edition name if the PDF is indexed and has not
+    changed on disk since, otherwise (None, None).
+    """
+    connection = _connection(database)
+    if connection is None:
+        return None, None
+    edition = os.path.basename(pdf_path)
+    try:
+        stat = os.stat(pdf_path)
+    except FileNotFoundError:
+        return None, None
+    row = connection.execute("SELECT mtime_ns, size FROM editions WHERE edition = ?", (edition,)).fetchone()
+    if row is None or row != (stat.st_mtime_ns, stat.st_size):
+        return None, None
+    return connection, edition
+
+
+def query_outline(pdf_path, database=INDEX_DATABASE):
+    """
+    Looks up the complete Part -> Section -> Subsection tree of an edition in the index database.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    database (str): Path to the index database.
+
+    Returns:
+    list: The same result as reference.extract_outline, or None if the edition is not indexed or is out of date.
+    """
+    connection, edition = _indexed_edition(pdf_path, database)
+    if connection is None:
+        return None
+    subsections = {}
+    for section_number, title, page_number in connection.execute(
+        "SELECT section_number, title, page_number FROM subsections WHERE edition = ? ORDER BY section_number, position",
+        (edition,)
+    ):
+        subsections.setdefault(section_number, []).append({'title': title, 'page_number': page_number})
+    sections = {}
+    for part_title, title, section_number, page_number, has_subsections in connection.execute(
+        "SELECT part_title, title, section_number, page_number, has_subsections FROM sections "
+        "WHERE edition = ? ORDER BY part_title, position",
+        (edition,)
+    ):
+        sections.setdefault(part_title, []).append({
+            'title': title,
+            'section_number': section_number,
+            'page_number': page_number,
+            'has_subsections': bool(has_subsections),
+            'subsections': subsections.get(section_number, []) if has_subsections else []
+        })
+    return [
+        {'title': title, 'page_number': page_number, 'sections': sections.get(title, [])}
+        for title, page_number in connection.execute(
+            "SELECT title, page_number FROM parts WHERE edition = ? ORDER BY position", (edition,)
+        )
+    ]
+
+
+# Quoted phrases or single words of a search query
+QUERY_TERM = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def _fts_query(query):
+    """
+    Turns a user search query into an FTS5 query: words must all appear on the page,
+    and text in double quotes must appear as a phrase.
+
+    Args:
+    query (str): The search text entered by the user.
+
+    Returns:
+    str: The FTS5 MATCH expression, or an empty string if the query has no terms.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM.findall(query):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    return ' '.join(terms)
+
+
+def search(query, limit=10, edition=None, database=INDEX_DATABASE):
+    """
+    Searches the page text of every indexed edition, ranking pages with BM25.
+
+    Args:
+    query (str): Words and "quoted phrases" to look for.
+    limit (int): Maximum number of hits to return.
+    edition (str): Restrict the search to one edition file, e.g. "2024_02.pdf".
+    database (str): Path to the index database.
+
+    Returns:
+    list: Dictionaries with the edition, page_number, section, subsection and a text snippet
+    of each hit, best match first, or None if the index database has not been built.
+    """
+    connection = _connection(database)
+    if connection is None:
+        return None
+    match = _fts_query(query)
+    if not match:
+        return []
+    sql = (
+        "SELECT edition, page_number, section, subsection, snippet(page_text, 0, '', '', '...', 16) "
+        "FROM page_text WHERE page_text MATCH ?"
+    )
+    parameters = [match]
+    if edition:
+        sql += " AND edition = ?"
+        parameters.append(edition)
+    sql += " ORDER BY bm25(page_text) LIMIT ?"
+    parameters.append(limit)
+    return [
+        {'edition': hit_edition, 'page_number': page_number, 'section': section, 'subsection': subsection, 'snippet': snippet}
+        for hit_edition, page_number, section, subsection, snippet in connection.execute(sql, parameters)
+    ]
+
+
+def indexed_editions(database=INDEX_DATABASE):
+    """
+    Returns the editions in the index database, oldest first, or None if it has not been built.
+    """
+    connection = _connection(database)
+    if connection is None:
+        return None
+    return [edition for edition, in connection.execute("SELECT edition FROM editions ORDER BY edition")]
+
+
+def compare_section(section_number, from_edition, to_edition, database=INDEX_DATABASE):
+    """
+    Lists what changed in a section between two indexed editions. Pairs compared at build
+    time are read as stored; any other pair is compared from the stored subsection text.
+
+    Args:
+    section_number (str): The number of the section, e.g. "403".
+    from_edition (str): The earlier edition, e.g. "2023_08.pdf".
+    to_edition (str): The later edition.
+    database (str): Path to the index database.
+
+    Returns:
+    dict: Whether the comparison was precomputed and the differences of each subsection as
+    returned by _compare_entries, or None if the index database has not been built.
+    """
+    connection = _connection(database)
+    if connection is None:
+        return None
+    precomputed = connection.execute(
+        "SELECT 1 FROM comparisons WHERE from_edition = ? AND to_edition = ?", (from_edition, to_edition)
+    ).fetchone() is not None
+    if precomputed:
+        differences = [
+            {'status': status, 'from_number': from_number, 'from_title': from_title,
+             'to_number': to_number, 'to_title': to_title, 'diff': diff}
+            for status, from_number, from_title, to_number, to_title, diff in connection.execute(
+                "SELECT status, from_number, from_title, to_number, to_title, diff FROM section_diffs "
+                "WHERE from_edition = ? AND to_edition = ? AND section_number = ? ORDER BY position",
+                (from_edition, to_edition, section_number)
+            )
+        ]
+    else:
+        differences = _compare_entries(
+            from_edition, _section_entries(connection, from_edition, section_number).get(section_number, []),
+            to_edition, _section_entries(connection, to_edition, section_number).get(section_number, [])
+        )
+    return {'precomputed': precomputed, 'subsections': differences}
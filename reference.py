@@ -1,13 +1,159 @@
 import os
 import fitz
 import re
+import html
 import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+import metrics
+
 
 # Determine the path to the PDF directory relative to the current file
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
-PDF_DIRECTORY = os.path.join(PROJECT_DIR, 'bluebook_pdfs')
+PDF_DIRECTORY = os.environ.get('BLUEBOOK_PDF_DIRECTORY', os.path.join(PROJECT_DIR, 'bluebook_pdfs'))
+
+# Maximum number of fitz.Document handles kept open at the same time
+DOCUMENT_POOL_SIZE = int(os.environ.get('BLUEBOOK_DOCUMENT_POOL_SIZE', 4))
+
+# How subsection headings are found: "text" (plain page text, the default) or "layout" (bold text runs)
+SUBSECTION_ENGINE = os.environ.get('BLUEBOOK_SUBSECTION_ENGINE', 'text')
+
+# Parsed TOCs and extraction results, keyed by absolute PDF path
+_outline_cache = {}
+_outline_cache_lock = threading.Lock()
+
+# Open fitz.Document handles in least recently used order, keyed by absolute PDF path
+_document_pool = OrderedDict()
+_document_pool_lock = threading.Lock()
+
+
+def _file_signature(pdf_path):
+    """
+    Returns a value that changes whenever the PDF file on disk is replaced or modified.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    tuple: The modification time (ns) and size of the file.
+    """
+    stat = os.stat(pdf_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class _PooledDocument:
+    """
+    An open fitz.Document together with the file signature it was opened with.
+    PyMuPDF documents are not thread safe, so every use goes through the lock.
+    """
+
+    def __init__(self, pdf_path, signature):
+        self.signature = signature
+        with metrics.timed_phase('open'):
+            self.doc = fitz.open(pdf_path)
+        metrics.DOCUMENTS_OPENED.inc()
+        self.lock = threading.RLock()
+
+
+@contextmanager
+def open_document(pdf_path):
+    """
+    Borrows an open fitz.Document for the PDF from the handle pool.
+
+    The handle is reopened when the file changes on disk, and the least recently
+    used handle is dropped once more than DOCUMENT_POOL_SIZE PDFs are open. The
+    document is locked for the duration of the with block, so callers must not
+    keep a reference to it afterwards.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Yields:
+    fitz.Document: The open document.
+    """
+    key = os.path.abspath(pdf_path)
+    signature = _file_signature(key)
+    with _document_pool_lock:
+        pooled = _document_pool.get(key)
+        if pooled is None or pooled.signature != signature:
+            pooled = _PooledDocument(key, signature)
+            _document_pool[key] = pooled
+        _document_pool.move_to_end(key)
+        while len(_document_pool) > DOCUMENT_POOL_SIZE:
+            # Evicted handles are closed by the garbage collector once no borrower holds them
+            _document_pool.popitem(last=False)
+    with pooled.lock:
+        yield pooled.doc
+
+
+def _memoize(pdf_path, key, compute):
+    """
+    Returns the cached result for key, computing it with compute() on the first call.
+    All cached results for a PDF are dropped when its modification time or size changes.
+
+    Args:
+    pdf_path (str): Path to the PDF file the result was derived from.
+    key (tuple): Identifies the result within the PDF's cache entry.
+    compute (callable): Produces the result when it is not cached yet.
+
+    Returns:
+    object: The cached result. It is shared between callers and must not be modified.
+    """
+    path = os.path.abspath(pdf_path)
+    signature = _file_signature(path)
+    with _outline_cache_lock:
+        entry = _outline_cache.get(path)
+        if entry is None or entry['signature'] != signature:
+            entry = {'signature': signature, 'results': {}, 'lock': threading.RLock()}
+            _outline_cache[path] = entry
+    results = entry['results']
+    if key in results:
+        metrics.CACHE_HITS.inc(kind=key[0])
+        return results[key]
+    # Only one thread per PDF parses at a time; the others wait and reuse its result
+    with entry['lock']:
+        if key in results:
+            metrics.CACHE_HITS.inc(kind=key[0])
+        else:
+            metrics.CACHE_MISSES.inc(kind=key[0])
+            results[key] = compute()
+        return results[key]
+
+
+def clear_cache():
+    """
+    Drops every cached outline result and releases the pooled document handles.
+    """
+    with _outline_cache_lock:
+        _outline_cache.clear()
+    with _document_pool_lock:
+        _document_pool.clear()
+
+
+# A forked worker (e.g. gunicorn with preload_app) must not share file handles with its parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_document_pool.clear)
+
+
+def get_toc(pdf_path):
+    """
+    Returns the PDF's table of contents, parsing it only once per version of the file.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    list: The TOC entries as returned by fitz.Document.get_toc().
+    """
+    def compute():
+        with open_document(pdf_path) as doc, metrics.timed_phase('toc'):
+            return doc.get_toc()
+    return _memoize(pdf_path, ('toc',), compute)
 
 def extract_part(pdf_path):
     """
@@ -19,12 +165,13 @@ def extract_part(pdf_path):
     Returns:
     list: A list of dictionaries containing part titles and their respective page numbers.
     """
+    return _memoize(pdf_path, ('part',), lambda: _extract_part(pdf_path))
+
+def _extract_part(pdf_path):
     part_info = []
-    with fitz.open(pdf_path) as doc:
-        toc = doc.get_toc()
-        for item in toc:
-            if re.match(r'^Part [0-9A-Z]+', item[1]):  # Check if the entry starts with "Part" followed by a number or a letter
-                part_info.append({'title': item[1], 'page_number': item[2]})
+    for item in get_toc(pdf_path):
+        if re.match(r'^Part [0-9A-Z]+', item[1]):  # Check if the entry starts with "Part" followed by a number or a letter
+            part_info.append({'title': item[1], 'page_number': item[2]})
     return part_info
 
 def extract_section(pdf_path, part_title):
@@ -38,30 +185,35 @@ def extract_section(pdf_path, part_title):
     Returns:
     list: A list of dictionaries containing section titles and their respective page numbers under the specified part.
     """
+    # Only known parts are cached, so arbitrary titles from requests cannot grow the cache
+    if not any(part['title'] == part_title for part in extract_part(pdf_path)):
+        return []
+    return _memoize(pdf_path, ('section', part_title), lambda: _extract_section(pdf_path, part_title))
+
+def _extract_section(pdf_path, part_title):
     section_info = []
-    with fitz.open(pdf_path) as doc:
-        toc = doc.get_toc()  
-        part_regex = re.compile(r'^Part [0-9A-Z]+')  
-        for item in toc:
-            if item[1] == part_title:  
-                start_index = toc.index(item)  
-                end_index = start_index + 1
-                while end_index < len(toc) and not part_regex.match(toc[end_index][1]):
-                    if toc[end_index][1].startswith("SECTION"):
-                        section_title = toc[end_index][1]
-                        has_subsections = contains_subsections(doc, toc, end_index)
-                        if not has_subsections:
-                            section_title += " [No Subsections]"
-                        section_info.append({'title': section_title, 'page_number': toc[end_index][2]})
-                    end_index += 1
-                break
+    toc = get_toc(pdf_path)
+    part_regex = re.compile(r'^Part [0-9A-Z]+')
+    subsection_index = build_subsection_index(pdf_path)
+    for item in toc:
+        if item[1] == part_title:  
+            start_index = toc.index(item)  
+            end_index = start_index + 1
+            while end_index < len(toc) and not part_regex.match(toc[end_index][1]):
+                if toc[end_index][1].startswith("SECTION"):
+                    section_title = toc[end_index][1]
+                    if not subsection_index.get(_section_number(section_title)):
+                        section_title += NO_SUBSECTIONS_SUFFIX
+                    section_info.append({'title': section_title, 'page_number': toc[end_index][2]})
+                end_index += 1
+            break
     return section_info
 
     
 
 def contains_subsections(doc, toc, section_index):
     """
-    Checks if a section has subsections by examining the table of contents.
+    Checks if a section has subsections by looking it up in the document's subsection index.
     
     Args:
     doc (fitz.Document): The PDF document object.
@@ -71,23 +223,170 @@ def contains_subsections(doc, toc, section_index):
     Returns:
     bool: True if subsections are found, False otherwise.
     """
-    section_page = toc[section_index][2]
-    end_page = doc.page_count
-    
-    if section_index + 1 < len(toc):
-        for i in range(section_index + 1, len(toc)):
-            if re.match(r'^Part \d+', toc[i][1]):
-                break
-            if toc[i][1].startswith("SECTION"):
-                end_page = toc[i][2] - 1
-                break
-    
-    for page_num in range(section_page - 1, end_page):
-        page_text = doc.load_page(page_num).get_text("text")
-        if re.search(r'\d+\.\d+', page_text):  # Simple pattern to identify subsections (e.g., 1.1, 1.2, etc.)
-            return True
-    
-    return False
+    section_number = _section_number(toc[section_index][1])
+    return bool(build_subsection_index(doc.name).get(section_number))
+
+
+def _section_number(section_title):
+    """
+    Returns the number of a TOC section title, e.g. "403" for "SECTION 403 ASPHALT".
+    """
+    words = section_title.split()
+    return words[1] if len(words) > 1 else ''
+
+
+# Appended by extract_section to sections without subsections
+NO_SUBSECTIONS_SUFFIX = " [No Subsections]"
+
+# Subsection headings such as "403.03 ASPHALT"; group 1 is the section number
+SUBSECTION_HEADING = re.compile(r'^(\d+)\.\d+\s[A-Z].*$')
+# The first subsection of a section must be ".01" with a title of at least two capital letters
+FIRST_SUBSECTION_HEADING = re.compile(r'^\d+\.01\s+[A-Z][A-Z].*$')
+# A subsection number on its own line, with the title on the following line
+SUBSECTION_NUMBER_LINE = re.compile(r'^\d+\.\d+$')
+CAPITAL_START = re.compile(r'^[A-Z]')
+TWO_CAPITALS_START = re.compile(r'^[A-Z][A-Z]')
+
+# A bold text run in PyMuPDF's XHTML output that starts with a subsection number; group 1 is the heading
+BOLD_SUBSECTION_HEADING = re.compile(r'<b>\s*(\d+\.\d+\s+[A-Z][^<]*?)\s*</b>')
+# The end of one bold run directly followed by another, e.g. a number and title set in different fonts
+ADJACENT_BOLD_RUNS = re.compile(r'\s*</b>\s*<b>\s*')
+
+
+def build_subsection_index(pdf_path, engine=None):
+    """
+    Builds the subsection list of every section in a single pass over the PDF's pages.
+
+    Only the pages from the first SECTION entry of the table of contents onwards are
+    scanned. The index is cached until the PDF changes on disk.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    engine (str): "text" to match headings in the plain page text, or "layout" to match only
+    bold text runs; defaults to SUBSECTION_ENGINE.
+
+    Returns:
+    dict: Maps each section number (str) to a list of dictionaries containing subsection titles and their page numbers.
+    """
+    engine = engine or SUBSECTION_ENGINE
+    if engine not in SUBSECTION_ENGINES:
+        raise ValueError(f"Unknown subsection engine '{engine}'; use one of {', '.join(SUBSECTION_ENGINES)}")
+    return _memoize(pdf_path, ('subsection_index', engine), lambda: SUBSECTION_ENGINES[engine](pdf_path))
+
+def _first_section_page(pdf_path):
+    """
+    Returns the 0-based index of the page holding the first SECTION entry of the TOC.
+    """
+    section_pages = [item[2] for item in get_toc(pdf_path) if item[1].startswith("SECTION")]
+    return max(min(section_pages) - 1, 0) if section_pages else 0
+
+def _add_subsection(subsection_index, line, page_num):
+    """
+    Adds a candidate heading line to the subsection index if it is a subsection heading.
+
+    Args:
+    subsection_index (dict): The index being built.
+    line (str): A stripped line of text, e.g. "403.03 ASPHALT.".
+    page_num (int): 0-based index of the page the line is on.
+    """
+    match = SUBSECTION_HEADING.match(line)
+    if not match:
+        return
+    subtopics = subsection_index.get(match.group(1))
+    if subtopics is None:
+        # Start collecting subtopics from .01 onwards where the title starts with at least two capital letters
+        if not FIRST_SUBSECTION_HEADING.match(line):
+            return
+        subtopics = subsection_index[match.group(1)] = []
+    elif not TWO_CAPITALS_START.match(line.split(maxsplit=1)[1]):
+        # Continue collecting subtopics only if the title starts with at least two capital letters
+        return
+    subtopics.append({
+        'title': line.rstrip('.'),
+        'page_number': page_num + 1  # Page numbers are 1-based index in PyMuPDF
+    })
+
+def _build_subsection_index(pdf_path):
+    first_page = _first_section_page(pdf_path)
+    subsection_index = {}
+    text_seconds = match_seconds = 0.0
+    with open_document(pdf_path) as doc:
+        for page_num in range(first_page, doc.page_count):
+            start = time.perf_counter()
+            lines = [line.strip() for line in doc.load_page(page_num).get_text("text").split("\n")]
+            text_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            for line in _combine_heading_lines(lines):
+                _add_subsection(subsection_index, line, page_num)
+            match_seconds += time.perf_counter() - start
+        metrics.PAGES_EXTRACTED.inc(doc.page_count - first_page)
+    metrics.record_phase('page_text', text_seconds)
+    metrics.record_phase('match', match_seconds)
+    return subsection_index
+
+def _build_subsection_index_layout(pdf_path):
+    """
+    Layout-aware engine: only bold text runs can be headings, so decimal numbers and
+    cross-references that happen to start a line of body text are ignored. MuPDF's
+    XHTML output already joins a heading's number and title when they sit on separate
+    lines, and producing it is cheaper than producing the plain text.
+
+    Falls back to the text engine for PDFs without any bold text.
+
+    Only measured on synthetic editions so far, not on the real Bluebooks' typography
+    (see Testing/benchmark.py --editions), which is why "text" remains the default.
+    """
+    first_page = _first_section_page(pdf_path)
+    subsection_index = {}
+    found_bold = False
+    text_seconds = match_seconds = 0.0
+    with open_document(pdf_path) as doc:
+        for page_num in range(first_page, doc.page_count):
+            start = time.perf_counter()
+            page_html = doc.load_page(page_num).get_text("xhtml")
+            text_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            if '<b>' in page_html:
+                found_bold = True
+                for heading in BOLD_SUBSECTION_HEADING.findall(ADJACENT_BOLD_RUNS.sub(' ', page_html)):
+                    _add_subsection(subsection_index, ' '.join(html.unescape(heading).split()), page_num)
+            match_seconds += time.perf_counter() - start
+        metrics.PAGES_EXTRACTED.inc(doc.page_count - first_page)
+    metrics.record_phase('page_text', text_seconds)
+    metrics.record_phase('match', match_seconds)
+    if not found_bold:
+        return _build_subsection_index(pdf_path)
+    return subsection_index
+
+def _combine_heading_lines(lines):
+    """
+    Combines lines where the subsection number and title are separated by a newline.
+
+    Args:
+    lines (list): The stripped text lines of a page.
+
+    Returns:
+    list: The lines with every split heading also present as a single line.
+    """
+    combined_lines = []
+    for i in range(len(lines)):
+        if SUBSECTION_NUMBER_LINE.match(lines[i]):
+            if i + 1 < len(lines) and CAPITAL_START.match(lines[i + 1]):
+                combined_lines.append(lines[i] + " " + lines[i + 1])
+                continue
+        combined_lines.append(lines[i])
+    return combined_lines
+
+
+
+# Subsection heading detection engines, selected with SUBSECTION_ENGINE
+SUBSECTION_ENGINES = {'text': _build_subsection_index, 'layout': _build_subsection_index_layout}
+
+# A misspelled engine fails at startup rather than in every outline request
+if SUBSECTION_ENGINE not in SUBSECTION_ENGINES:
+    raise ValueError(
+        f"Unknown BLUEBOOK_SUBSECTION_ENGINE '{SUBSECTION_ENGINE}'; use one of {', '.join(SUBSECTION_ENGINES)}"
+    )
 
 
 
@@ -100,91 +399,217 @@ def extract_subsection(pdf_path, section_number):
     Returns:
     list: A list of dictionaries containing subsection titles and their page numbers.
     """
-    subtopic_info = []
-    first_subsection_found = False
-    subsection_pattern = rf'^{section_number}\.\d+\s[A-Z].*$'
-    with fitz.open(pdf_path) as doc:
-        for page_num in range(len(doc)):
-            page_text = doc.load_page(page_num).get_text("text")
-            lines = page_text.split("\n")
-            combined_lines = []
-            # Combine lines where the section number and title are separated by a newline
-            for i in range(len(lines)):
-                if re.match(rf'^{section_number}\.\d+$', lines[i].strip()):
-                    if i + 1 < len(lines) and re.match(r'^[A-Z]', lines[i + 1].strip()):
-                        combined_lines.append(lines[i].strip() + " " + lines[i + 1].strip())
-                        continue
-                combined_lines.append(lines[i].strip())
-            for line in combined_lines:
-                match = re.match(subsection_pattern, line)
-                if match:
-                    if not first_subsection_found:
-                        # Start collecting subtopics from .01 onwards where the title starts with at least two capital letters
-                        if re.match(rf'^{section_number}\.01\s+[A-Z][A-Z].*$', line):
-                            first_subsection_found = True
-                            subtopic_title = line.rstrip('.')
-                            subtopic_info.append({
-                                'title': subtopic_title,
-                                'page_number': page_num + 1  # Page numbers are 1-based index in PyMuPDF
-                            })
-                    else:
-                        # Continue collecting subtopics if the title starts with at least two capital letters
-                        if re.match(r'^[A-Z][A-Z].*$', line.split(maxsplit=1)[1]):
-                            subtopic_title = line.rstrip('.')
-                            subtopic_info.append({
-                                'title': subtopic_title,
-                                'page_number': page_num + 1  # Page numbers are 1-based index in PyMuPDF
-                            })
-    return subtopic_info
+    return build_subsection_index(pdf_path).get(section_number, [])
 
 
 
-if __name__ == "__main__":
-    pdf_files = os.listdir(PDF_DIRECTORY)
-    if pdf_files:
-
-        # Define the path to your PDF and the page number you want to test
-        # Make sure to use the correct path to your PDF file
-        pdf_selected = pdf_files[0]  # Adjust index as needed to select PDF
-        pdf_path = os.path.join(PDF_DIRECTORY, pdf_selected)
-
-        # Extract parts
-        parts = extract_part(pdf_path)
-        
-        # Display all part titles with their corresponding page numbers
-        print("Part Titles and Page Numbers:")
-        for part in parts:
-            print(f"- Part Title: {part['title']}, Page Number: {part['page_number']}")
-        
-        # Select the first part
-        part_index = 0  # Change this index to select a different part
-        part_selected = parts[part_index]
-        print(f"\nSelected Part: {part_selected['title']}")
-        
-        # Extract sections under the selected part
-        sections = extract_section(pdf_path, part_selected['title'])
-        
-        # Display all section titles with their corresponding page numbers (filtered)
-        print("\nSection Titles and Page Numbers (Filtered):")
-        for section in sections:
-            if not section['title'].endswith("[No Subsections]"):
-                print(f"- Section Title: {section['title']}, Page Number: {section['page_number']}")
-        
-        # Select a section index for the selected part
-        section_index = 0  # Change this index to select a different section
-        
-        # Assuming section_index is correctly defined
-        if section_index < len(sections):
-            section_selected = sections[section_index]
-            print(f"\nSelected Section: {section_selected['title']}")
+def extract_outline(pdf_path):
+    """
+    Extracts the complete Part -> Section -> Subsection tree of the PDF using the
+    same functions that serve the individual dropdowns.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    list: A list of part dictionaries (title, page_number, sections). Each section has a
+    title, section_number, page_number, has_subsections flag and its list of subsections.
+    """
+    outline = []
+    for part in extract_part(pdf_path):
+        sections = []
+        for section in extract_section(pdf_path, part['title']):
+            title = section['title']
+            has_subsections = not title.endswith(NO_SUBSECTIONS_SUFFIX)
+            if not has_subsections:
+                title = title[:-len(NO_SUBSECTIONS_SUFFIX)]
+            section_number = _section_number(title)
+            sections.append({
+                'title': title,
+                'section_number': section_number,
+                'page_number': section['page_number'],
+                'has_subsections': has_subsections,
+                'subsections': extract_subsection(pdf_path, section_number) if has_subsections else []
+            })
+        outline.append({'title': part['title'], 'page_number': part['page_number'], 'sections': sections})
+    return outline
+
+
+
+def section_page_range(pdf_path, section_number):
+    """
+    Finds the pages of a section from the PDF's table of contents: from the section's
+    own entry up to the page before the next section or part starts.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    section_number (str): The number of the section, e.g. "403".
+
+    Returns:
+    dict: The section title and its first and last page numbers (1-based), or None if the section is not in the TOC.
+    """
+    return _memoize(pdf_path, ('section_pages', section_number), lambda: _section_page_range(pdf_path, section_number))
+
+def _section_page_range(pdf_path, section_number):
+    toc = get_toc(pdf_path)
+    for index, item in enumerate(toc):
+        if item[1].startswith("SECTION") and _section_number(item[1]) == section_number:
+            level, title, first_page = item[0], item[1], item[2]
+            with open_document(pdf_path) as doc:
+                last_page = doc.page_count
+            for following in toc[index + 1:]:
+                if following[0] <= level:
+                    last_page = max(first_page, following[2] - 1)
+                    break
+            return {'title': title, 'first_page': first_page, 'last_page': last_page}
+    return None
+
+
+
+def extract_pages_pdf(pdf_path, first_page, last_page, toc=()):
+    """
+    Copies a range of pages into a new, standalone PDF.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    first_page (int): First page to copy (1-based).
+    last_page (int): Last page to copy (1-based, inclusive).
+    toc (list): Bookmarks for the new PDF as [level, title, page] entries, with pages relative to first_page.
+
+    Returns:
+    bytes: The new PDF.
+    """
+    with metrics.timed_phase('render'):
+        excerpt = fitz.open()
+        with open_document(pdf_path) as doc:
+            excerpt.insert_pdf(doc, from_page=first_page - 1, to_page=last_page - 1, links=False, annots=False)
+        if toc:
+            excerpt.set_toc(list(toc))
+        data = excerpt.tobytes(garbage=3, deflate=True)
+        excerpt.close()
+    return data
+
+def render_page_png(pdf_path, page_number, dpi=110):
+    """
+    Renders a page of the PDF as a PNG image.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    page_number (int): The page to render (1-based).
+    dpi (int): Resolution of the image.
+
+    Returns:
+    bytes: The PNG image.
+    """
+    with open_document(pdf_path) as doc, metrics.timed_phase('render'):
+        return doc.load_page(page_number - 1).get_pixmap(dpi=dpi).tobytes("png")
+
+
+
+def extract_page_text(pdf_path):
+    """
+    Extracts the plain text of every page of the PDF.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+
+    Returns:
+    list: The text of each page, in page order.
+    """
+    with open_document(pdf_path) as doc, metrics.timed_phase('page_text'):
+        metrics.PAGES_EXTRACTED.inc(doc.page_count)
+        return [doc.load_page(page_num).get_text("text") for page_num in range(doc.page_count)]
+
+
+
+def print_sample(pdf_path):
+    """
+    Prints the parts of the PDF, the sections of its first part and the
+    subsections of that part's first section.
+
+    Args:
+    pdf_path (str): Path to the PDF file.
+    """
+    # Extract parts
+    parts = extract_part(pdf_path)
     
-            # Extract subsections under the selected section
-            section_number = section_selected['title'].split()[1]
-            subsections = extract_subsection(pdf_path, section_number)
+    # Display all part titles with their corresponding page numbers
+    print("Part Titles and Page Numbers:")
+    for part in parts:
+        print(f"- Part Title: {part['title']}, Page Number: {part['page_number']}")
     
-            # Display all subsection titles with their corresponding page numbers
-            print("\nSubsection Titles and Page Numbers:")
-            for subsection in subsections:
-                print(f"- Subsection Title: {subsection['title']}, Page Number: {subsection['page_number']}")
-        else:
-            print(f"\nInvalid section index {section_index}. No section found.")
\ No newline at end of file
+    # Select the first part
+    part_index = 0  # Change this index to select a different part
+    part_selected = parts[part_index]
+    print(f"\nSelected Part: {part_selected['title']}")
+    
+    # Extract sections under the selected part
+    sections = extract_section(pdf_path, part_selected['title'])
+    
+    # Display all section titles with their corresponding page numbers (filtered)
+    print("\nSection Titles and Page Numbers (Filtered):")
+    for section in sections:
+        if not section['title'].endswith("[No Subsections]"):
+            print(f"- Section Title: {section['title']}, Page Number: {section['page_number']}")
+    
+    # Select a section index for the selected part
+    section_index = 0  # Change this index to select a different section
+    
+    # Assuming section_index is correctly defined
+    if section_index < len(sections):
+        section_selected = sections[section_index]
+        print(f"\nSelected Section: {section_selected['title']}")
+    
+        # Extract subsections under the selected section
+        section_number = section_selected['title'].split()[1]
+        subsections = extract_subsection(pdf_path, section_number)
+    
+        # Display all subsection titles with their corresponding page numbers
+        print("\nSubsection Titles and Page Numbers:")
+        for subsection in subsections:
+            print(f"- Subsection Title: {subsection['title']}, Page Number: {subsection['page_number']}")
+    else:
+        print(f"\nInvalid section index {section_index}. No section found.")
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the outline of the RIDOT Bluebook PDFs.")
+    subcommands = parser.add_subparsers(dest='command')
+    build_parser = subcommands.add_parser('build-index', help="Write the outline of every Bluebook into the shared index database.")
+    build_parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (defaults to one per CPU).")
+    build_parser.add_argument('--force', action='store_true', help="Rebuild every edition even if its checksum is unchanged.")
+    export_parser = subcommands.add_parser('export', help="Write every part, section and subsection of every Bluebook as one flat table.")
+    export_parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="Output format (defaults to JSON Lines).")
+    export_parser.add_argument('--output', default=None, help="File to write to (defaults to standard output).")
+    export_parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (defaults to one per CPU).")
+    export_parser.add_argument('editions', nargs='*', help="File names of the editions to export (defaults to every Bluebook).")
+    args = parser.parse_args()
+
+    if args.command == 'build-index':
+        import outline_index
+        outline_index.build_index(PDF_DIRECTORY, workers=args.workers, force=args.force)
+    elif args.command == 'export':
+        import sys
+        import outline_export
+        # Unknown editions are reported before the output file is created
+        try:
+            editions = outline_export.export_editions(PDF_DIRECTORY, args.editions or None)
+        except (OSError, ValueError) as e:
+            export_parser.error(str(e))
+        output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+        try:
+            result = outline_export.export_index(
+                output, PDF_DIRECTORY, output_format=args.format, workers=args.workers, editions=editions
+            )
+        finally:
+            if args.output:
+                output.close()
+        if result['failed']:
+            print(f"Failed to export {len(result['failed'])} Bluebook(s): {', '.join(result['failed'])}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        pdf_files = sorted(file for file in os.listdir(PDF_DIRECTORY) if file.endswith('.pdf'))
+        if pdf_files:
+            # Adjust index as needed to select PDF
+            print_sample(os.path.join(PDF_DIRECTORY, pdf_files[0]))
@@ -0,0 +1,175 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+import metrics
+
+"""
+This python file keeps rendered section excerpts (PDF page ranges and page
+images) in a two-level least recently used cache: a small one in memory and a
+larger one on disk that every gunicorn worker shares. Both levels are bounded by
+their total size in bytes, so popular sections are served as stored bytes while
+rarely requested ones are eventually dropped.
+"""
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIRECTORY = os.environ.get('BLUEBOOK_RENDER_CACHE_DIRECTORY', os.path.join(PROJECT_DIR, 'render_cache'))
+
+# Size limits of the two cache levels, in bytes
+MEMORY_LIMIT = int(os.environ.get('BLUEBOOK_RENDER_CACHE_MEMORY', 64 * 1024 * 1024))
+DISK_LIMIT = int(os.environ.get('BLUEBOOK_RENDER_CACHE_DISK', 1024 * 1024 * 1024))
+
+
+class RenderCache:
+    """
+    Maps string keys to rendered bytes. A key must identify its content completely
+    (e.g. include the PDF's modification time), since entries are never invalidated,
+    only evicted.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, memory_limit=MEMORY_LIMIT, disk_limit=DISK_LIMIT):
+        """
+        Args:
+        directory (str): Directory of the disk cache; created on first write.
+        memory_limit (int): Maximum total size of the entries kept in memory, in bytes.
+        disk_limit (int): Maximum total size of the files kept on disk, in bytes (0 disables the disk cache).
+        """
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def _remember(self, key, data):
+        """
+        Adds an entry to the memory cache, evicting the least recently used entries over the limit.
+        """
+        if len(data) > self.memory_limit:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _read_disk(self, key):
+        if not self.disk_limit:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            # The modification time orders the files for eviction
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.disk_limit or len(data) > self.disk_limit:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk()[1]
+            else:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_limit:
+                self._evict_disk()
+
+    def _scan_disk(self):
+        """
+        Returns the cache files as (modification time, size, path), oldest first, and their total size.
+        """
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        return files, sum(size for _, size, _ in files)
+
+    def _evict_disk(self):
+        """
+        Deletes the least recently used files until the disk cache is within its limit.
+        Must be called with the lock held.
+        """
+        # Other workers write to the same directory, so recount before deleting anything
+        files, self._disk_size = self._scan_disk()
+        for _, size, path in files:
+            if self._disk_size <= self.disk_limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_size -= size
+
+    def get(self, key, compute):
+        """
+        Returns the bytes cached for key, rendering them with compute() if neither level has them.
+
+        Args:
+        key (str): Identifies the content.
+        compute (callable): Produces the bytes when they are not cached.
+
+        Returns:
+        bytes: The cached or newly rendered content.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        if data is not None:
+            metrics.RENDER_CACHE_REQUESTS.inc(result='memory')
+            return data
+
+        # Only one thread renders a given key; the others wait and reuse the result
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                with self._lock:
+                    data = self._memory.get(key)
+                if data is not None:
+                    metrics.RENDER_CACHE_REQUESTS.inc(result='memory')
+                    return data
+                data = self._read_disk(key)
+                if data is not None:
+                    metrics.RENDER_CACHE_REQUESTS.inc(result='disk')
+                else:
+                    metrics.RENDER_CACHE_REQUESTS.inc(result='miss')
+                    data = compute()
+                    try:
+                        self._write_disk(key, data)
+                    except OSError as e:
+                        print(f"Failed to write the render cache: {e}")
+                self._remember(key, data)
+                return data
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def clear(self):
+        """
+        Drops the entries kept in memory. Files on disk are left for the other workers.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
@@ -9,21 +9,91 @@ $(document).ready(function () {
     const $sectionSelect = $('#section-select');
     const $subsectionSelect = $('#subsection-select');
     const $submitBtn = $('#submit-btn');
-    let urls = {};
+    const $titleSearch = $('#title-search');
+    const $titleSuggestions = $('#title-suggestions');
 
     // Hide reference options and dropdowns initially
     $referenceOptions.hide();
     $dropdowns.hide();
 
-    // Fetch URLs from the JSON file
-    $.getJSON('/static/pdf_urls.json', function (data) {
-        urls = data.urls;
-    });
+    // Outline (Part -> Section -> Subsection tree) of the selected PDF
+    let outline = null;
+    // Outlines loaded during this page visit and their requests, keyed by PDF file name
+    const outlines = {};
+    const outlineRequests = {};
+
+    // Read and write the outlines cached in localStorage, keyed by PDF file name
+    function readCachedOutline(pdfFile) {
+        try {
+            return JSON.parse(localStorage.getItem('bluebook-outline:' + pdfFile));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    function writeCachedOutline(pdfFile, etag, data) {
+        try {
+            localStorage.setItem('bluebook-outline:' + pdfFile, JSON.stringify({ etag: etag, data: data }));
+        } catch (e) {
+            // Storage full or unavailable; the outline is simply fetched again next time
+        }
+    }
+
+    // Load the outline of a PDF once per page visit. A copy cached in localStorage is
+    // used right away and revalidated with its ETag in the background.
+    function loadOutline(pdfFile, callback) {
+        if (outlines[pdfFile]) {
+            callback(outlines[pdfFile]);
+            return;
+        }
+        const cached = readCachedOutline(pdfFile);
+        if (cached) {
+            outlines[pdfFile] = cached.data;
+            callback(cached.data);
+        }
+        if (!outlineRequests[pdfFile]) {
+            outlineRequests[pdfFile] = $.ajax({
+                url: '/api/outline/' + encodeURIComponent(pdfFile),
+                dataType: 'json',
+                headers: cached && cached.etag ? { 'If-None-Match': cached.etag } : {},
+                success: function (data, status, xhr) {
+                    if (xhr.status === 202) {
+                        // The server is still indexing this edition; try again shortly
+                        delete outlineRequests[pdfFile];
+                        setTimeout(function () { loadOutline(pdfFile, callback); }, 2000);
+                        return;
+                    }
+                    if (xhr.status === 304 || !data) return;
+                    outlines[pdfFile] = data;
+                    writeCachedOutline(pdfFile, xhr.getResponseHeader('ETag'), data);
+                },
+                error: function () {
+                    delete outlineRequests[pdfFile];
+                }
+            });
+        }
+        if (!cached) {
+            outlineRequests[pdfFile].done(function () {
+                if (outlines[pdfFile]) callback(outlines[pdfFile]);
+            });
+        }
+    }
+
+    function findPart(partTitle) {
+        return outline ? outline.parts.find(part => part.title === partTitle) : undefined;
+    }
+
+    function findSection(sectionTitle) {
+        const part = findPart($partSelect.val());
+        return part ? part.sections.find(section => section.title === sectionTitle) : undefined;
+    }
 
     // Show reference options once a PDF is selected
     $pdfSelect.change(function () {
         $referenceOptions.toggle(!!$(this).val());
         $dropdowns.hide();
+        // Start loading the outline while the user picks a reference type
+        if ($(this).val()) loadOutline($(this).val(), function () {});
     });
 
     // Handle radio button changes
@@ -52,10 +122,12 @@ $(document).ready(function () {
     function populateParts() {
         const pdfFile = $pdfSelect.val();
         if (pdfFile) {
-            $.post('/get_part_titles', { pdf_file: pdfFile }, function (response) {
+            loadOutline(pdfFile, function (data) {
+                if ($pdfSelect.val() !== pdfFile) return;
+                outline = data;
                 $partSelect.empty().html('<option value="" selected disabled>--Select Part--</option>');
-                response.forEach(part => {
-                    $partSelect.append(`<option value="${part.title}" data-page="${part.page_number}">${part.title}</option>`);
+                outline.parts.forEach(part => {
+                    $partSelect.append($('<option>').val(part.title).attr('data-page', part.page_number).text(part.title));
                 });
                 $partDropdown.show();
                 $dropdowns.show();
@@ -74,9 +146,12 @@ $(document).ready(function () {
 
     // Function to populate sections based on selected part
     function populateSections(selectedPart) {
-        const pdfFile = $pdfSelect.val();
-        $.get('/get_sections', { pdf_selected: pdfFile, part_selected: selectedPart }, function (response) {
-            $sectionSelect.empty().html('<option value="" selected disabled>--Select Section--</option>').append(response);
+        const part = findPart(selectedPart);
+        $sectionSelect.empty().html('<option value="" selected disabled>--Select Section--</option>');
+        if (!part) return;
+        // Sections without subsections are not listed
+        part.sections.filter(section => section.has_subsections).forEach(section => {
+            $sectionSelect.append($('<option>').val(section.page_number).text(section.title));
         });
     }
 
@@ -89,9 +164,11 @@ $(document).ready(function () {
 
     // Function to populate subsections based on selected section
     function populateSubsections(selectedSection) {
-        const pdfFile = $pdfSelect.val();
-        $.get('/get_subsections', { pdf_selected: pdfFile, section_selected: selectedSection }, function (response) {
-            $subsectionSelect.empty().html('<option value="" selected disabled>--Select Subsection--</option>').append(response);
+        const section = findSection(selectedSection);
+        $subsectionSelect.empty().html('<option value="" selected disabled>--Select Subsection--</option>');
+        if (!section) return;
+        section.subsections.forEach(subsection => {
+            $subsectionSelect.append($('<option>').val(subsection.page_number).text(subsection.title));
         });
     }
 
@@ -108,14 +185,55 @@ $(document).ready(function () {
         $submitBtn.prop('disabled', !isValid);
     }).change();
 
+    // Suggest titles as the user types, waiting for a pause in typing before asking the server.
+    // Only the selected edition is searched once one is chosen.
+    let suggestTimer = null;
+    let suggestRequest = null;
+    $titleSearch.on('input', function () {
+        clearTimeout(suggestTimer);
+        const prefix = $(this).val().trim();
+        if (!prefix) {
+            $titleSuggestions.empty();
+            return;
+        }
+        suggestTimer = setTimeout(function () {
+            if (suggestRequest) suggestRequest.abort();
+            const query = { prefix: prefix };
+            if ($pdfSelect.val()) query.edition = $pdfSelect.val();
+            suggestRequest = $.getJSON('/api/suggest', query, function (data, status, xhr) {
+                $titleSuggestions.empty();
+                // The server is still indexing the selected edition; there is nothing to suggest yet
+                if (xhr.status === 202 || !data || !data.suggestions) return;
+                data.suggestions.forEach(suggestion => {
+                    const editionName = $pdfSelect.find('option').filter(function () {
+                        return $(this).val() === suggestion.edition;
+                    }).text();
+                    $titleSuggestions.append($('<li>').attr('data-url', suggestion.url)
+                        .text(`${suggestion.title} (page ${suggestion.page_number}, ${editionName || suggestion.edition})`));
+                });
+            });
+        }, 200);
+    });
+
+    // Jump straight to the page of a suggestion
+    $titleSuggestions.on('click', 'li', function () {
+        window.open($(this).attr('data-url'), '_blank');
+    });
+
     // Event listener for submit button click
     $submitBtn.click(function (e) {
         e.preventDefault();
         const pdfName = $pdfSelect.val();
         const referenceType = $('input[name="reference-type"]:checked').val();
         const pageNumber = referenceType === 'part' ? $partSelect.find('option:selected').attr('data-page') : $(`#${referenceType}-select`).val();
-        const fullUrl = urls[pdfName] + `#page=${pageNumber}`;
-        if (pdfName in urls) window.open(fullUrl, '_blank');
-        else alert('PDF link not found.');
+        const section = referenceType === 'part' ? undefined : findSection($sectionSelect.find('option:selected').text());
+        if (section) {
+            // Open only the section's pages, served from the local copy of the Bluebook
+            const excerptPage = pageNumber - section.page_number + 1;
+            window.open(`/excerpt/${encodeURIComponent(pdfName)}/${encodeURIComponent(section.section_number)}#page=${excerptPage}`, '_blank');
+            return;
+        }
+        // Served locally with byte ranges, so the viewer only fetches the pages it shows
+        window.open(`/pdf/${encodeURIComponent(pdfName)}#page=${pageNumber}`, '_blank');
     });
 });
\ No newline at end of file
@@ -0,0 +1,116 @@
+import heapq
+import bisect
+from array import array
+
+"""
+This python file builds the typeahead index behind /api/suggest. Every part,
+section and subsection title of an edition is stored once, and the lowercased
+titles are kept in a sorted list, so all titles starting with a prefix (e.g.
+"403.0") form a single contiguous range found with two binary searches. A second
+sorted list holds the text from each later word of the titles onwards, so titles
+containing a word that starts with the prefix (e.g. "asph") are found the same way.
+"""
+
+
+class TitleIndex:
+    """
+    The part, section and subsection titles of one edition, searchable by word prefix.
+    """
+
+    def __init__(self, edition, outline):
+        """
+        Args:
+        edition (str): File name of the edition, e.g. "2024_02.pdf".
+        outline (list): The edition's outline as returned by reference.extract_outline.
+        """
+        self.edition = edition
+        # (kind, title, page_number, section_number) of every title, in outline order
+        self.titles = []
+        seen = set()
+        for part in outline:
+            self.titles.append(('part', part['title'], part['page_number'], ''))
+            for section in part['sections']:
+                # A section listed under several parts is only suggested once
+                if section['section_number'] in seen:
+                    continue
+                seen.add(section['section_number'])
+                self.titles.append(('section', section['title'], section['page_number'], section['section_number']))
+                for subsection in section['subsections']:
+                    self.titles.append(
+                        ('subsection', subsection['title'], subsection['page_number'], section['section_number'])
+                    )
+
+        titles = []
+        suffixes = []
+        for position, (_, title, _, _) in enumerate(self.titles):
+            words = title.lower().split()
+            titles.append((' '.join(words), position))
+            for start in range(1, len(words)):
+                suffixes.append((' '.join(words[start:]), position))
+        titles.sort()
+        suffixes.sort()
+        # Sorted keys with the positions of their titles in a parallel typed array
+        self.title_keys = [key for key, _ in titles]
+        self.title_positions = array('I', (position for _, position in titles))
+        self.suffix_keys = [key for key, _ in suffixes]
+        self.suffix_positions = array('I', (position for _, position in suffixes))
+
+    def matches(self, prefix, whole_titles=True):
+        """
+        Yields (key, title position) for every key starting with prefix, in key order.
+
+        Args:
+        prefix (str): Lowercased, whitespace-normalized prefix.
+        whole_titles (bool): Match the start of the titles, or the start of their later words.
+        """
+        keys, positions = (self.title_keys, self.title_positions) if whole_titles else (self.suffix_keys, self.suffix_positions)
+        start = bisect.bisect_left(keys, prefix)
+        # Every key starting with prefix sorts before prefix followed by the highest code point
+        end = bisect.bisect_left(keys, prefix + '\U0010ffff', start)
+        for index in range(start, end):
+            yield keys[index], positions[index]
+
+
+def suggest(indexes, prefix, limit=10):
+    """
+    Finds titles with a word starting with prefix in one or more editions.
+
+    Args:
+    indexes (list): The TitleIndex of every edition to search.
+    prefix (str): Text typed by the user, e.g. "403.03" or "asphalt pav".
+    limit (int): Maximum number of suggestions.
+
+    Returns:
+    list: Dictionaries with the edition, kind ("part", "section" or "subsection"), title,
+    page number and section number of each match. Titles that start with the prefix come first.
+    """
+    prefix = ' '.join(prefix.lower().split())
+    if not prefix:
+        return []
+
+    by_edition = {index.edition: index for index in indexes}
+
+    def tagged(index, whole_titles):
+        for key, position in index.matches(prefix, whole_titles):
+            yield key, index.edition, position
+
+    suggestions = []
+    seen = set()
+    # Merging the sorted ranges of every edition keeps them in key order; titles that
+    # start with the prefix are collected first, then those matched by a later word
+    for whole_titles in (True, False):
+        for _, edition, position in heapq.merge(*(tagged(index, whole_titles) for index in indexes)):
+            if len(suggestions) >= limit:
+                break
+            if (edition, position) in seen:
+                continue
+            seen.add((edition, position))
+            kind, title, page_number, section_number = by_edition[edition].titles[position]
+            suggestions.append({
+                'edition': edition,
+                'kind': kind,
+                'title': title,
+                'page_number': page_number,
+                'section_number': section_number
+            })
+    return suggestions